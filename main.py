@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import multiprocessing
 import os
 import sys
 
@@ -22,17 +23,15 @@ from rpp.gpx_export import export_edge_list_gpx, export_gpx, select_endpoint_nod
 def _parse_point(label: str, raw: str | None) -> tuple[float, float] | None:
     if raw is None:
         return None
-    parts = [p.strip() for p in raw.split(",")]
-    if len(parts) != 2:
+    lat_s, sep, lon_s = raw.partition(",")
+    if not sep or "," in lon_s:
         raise ValueError(f"--{label} must be provided as 'lat,lon'.")
     try:
-        lat = float(parts[0])
-        lon = float(parts[1])
+        return float(lat_s), float(lon_s)
     except ValueError as exc:
         raise ValueError(
             f"--{label} must contain valid numbers like '51.0,6.1'."
         ) from exc
-    return lat, lon
 
 
 def _default_osm_path() -> str:
@@ -82,6 +81,12 @@ def main():
         default=None,
         help="Optional end coordinate as 'lat,lon' to snap to the nearest node",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes for the shortest-path sweeps (0 = one per CPU core)",
+    )
     args = parser.parse_args()
     if args.osm is None:
         args.osm = _default_osm_path()
@@ -90,6 +95,7 @@ def main():
     end_request = _parse_point("end", args.end)
     if end_request is not None and start_request is None:
         raise ValueError("--end requires --start.")
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
 
     G_drive, G_service_undirected, G_service_directed = load_graphs(
         args.osm,
@@ -98,10 +104,14 @@ def main():
 
     if args.directed_service:
         R = build_required_graph_directed(G_service_directed)
+        scc = None
         if args.drop_drpp_blockers or args.drpp_blockers_gpx:
-            blockers, _required_outside, _scc_index, _scc_sizes, _largest = find_drpp_blocking_edges(
+            blockers, _required_outside, scc_index, scc_sizes, largest = find_drpp_blocking_edges(
                 G_drive, R
             )
+            # Dropping blockers changes R only, so the SCCs of G_drive still hold.
+            if largest is not None:
+                scc = (scc_index, scc_sizes, largest)
             blocker_edges = [(u, v) for u, v, _su, _sv in blockers]
 
             if args.drpp_blockers_gpx and blocker_edges:
@@ -116,10 +126,14 @@ def main():
                     f"WARNING: Dropping {len(blocker_edges)} blocking required edges outside the largest SCC.",
                     file=sys.stderr,
                 )
+                touched = set()
                 for u, v in blocker_edges:
                     if R.has_edge(u, v):
                         R.remove_edge(u, v)
-                isolates = [n for n in R.nodes if R.degree(n) == 0]
+                        touched.add(u)
+                        touched.add(v)
+                # Only endpoints of removed edges can have become isolated.
+                isolates = [n for n in touched if R.degree(n) == 0]
                 if isolates:
                     R.remove_nodes_from(isolates)
         base_graph = build_drpp_base_graph(
@@ -127,6 +141,8 @@ def main():
             G_service_directed,
             R,
             diagnostics_path=args.drpp_diagnostics,
+            scc=scc,
+            workers=workers,
         )
         if start_request is not None:
             (
@@ -166,11 +182,12 @@ def main():
             start_node=start_node,
             end_node=end_node,
             base_graph=base_graph,
+            workers=workers,
         )
         export_gpx(E, G_service_directed, "rpp_route.gpx", start_node=start_node, end_node=end_node)
     else:
         R = build_required_graph_undirected(G_service_undirected)
-        base_graph = build_rpp_base_graph(G_drive, G_service_undirected, R)
+        base_graph = build_rpp_base_graph(G_drive, G_service_undirected, R, workers=workers)
         if start_request is not None:
             (
                 start_node,
@@ -208,10 +225,13 @@ def main():
             start_node=start_node,
             end_node=end_node,
             base_graph=base_graph,
+            workers=workers,
         )
         export_gpx(E, G_service_undirected, "rpp_route.gpx", start_node=start_node, end_node=end_node)
     print("Done. GPX written: rpp_route.gpx")
 
 
 if __name__ == "__main__":
+    # Needed for the process pool in PyInstaller onefile builds.
+    multiprocessing.freeze_support()
     main()
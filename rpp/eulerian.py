@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import networkx as nx
+
+
+def eulerian_tour(E: nx.MultiGraph, source=None, *, open_path: bool = False) -> list[tuple]:
+    """
+    Return an Eulerian circuit (or path) of E as a list of (u, v, key) edges.
+
+    Drop-in for nx.eulerian_circuit / nx.eulerian_path with keys=True:
+      - open_path=False: circuit starting at source (default: first node of E)
+      - open_path=True: path starting at source, which must be the odd node
+        (out-in=1 node for directed graphs)
+
+    Iterative Hierholzer over flat per-node edge lists with a used-edge mask,
+    instead of NetworkX's copy-and-remove-edges walk.
+    """
+    if E.number_of_edges() == 0:
+        return []
+
+    # Per-node incidence lists of (edge id, other endpoint, key); the key
+    # travels with the entry so no separate edge table is kept.
+    directed = E.is_directed()
+    adj = {n: [] for n in E}
+    m = 0
+    for u, v, k in E.edges(keys=True):
+        adj[u].append((m, v, k))
+        if not directed:
+            adj[v].append((m, u, k))
+        m += 1
+
+    if source is None:
+        source = next(iter(E))
+    if source not in adj:
+        raise nx.NetworkXError(f"Source {source} is not in the graph.")
+    _check_degrees(E, adj, source, directed, open_path)
+
+    used = bytearray(m)
+    ptr = dict.fromkeys(adj, 0)
+    stack = [(source, None)]
+    tour = []
+    while stack:
+        node, arrived_by = stack[-1]
+        candidates = adj[node]
+        i = ptr[node]
+        while i < len(candidates) and used[candidates[i][0]]:
+            i += 1
+        if i == len(candidates):
+            ptr[node] = i
+            stack.pop()
+            if arrived_by is not None:
+                tour.append(arrived_by)
+            continue
+        eid, other, key = candidates[i]
+        ptr[node] = i + 1
+        used[eid] = 1
+        stack.append((other, (node, other, key)))
+
+    if len(tour) != m:
+        raise nx.NetworkXError("Graph has no Eulerian tour: edges are not connected.")
+
+    tour.reverse()
+    return tour
+
+
+def _check_degrees(E, adj, source, directed, open_path):
+    if directed:
+        in_degree = dict(E.in_degree())
+        unbalanced = [n for n in adj if len(adj[n]) != in_degree[n]]
+        if not open_path:
+            ok = not unbalanced
+        else:
+            ok = (
+                len(unbalanced) == 2
+                and len(adj[source]) - in_degree[source] == 1
+                and all(abs(len(adj[n]) - in_degree[n]) == 1 for n in unbalanced)
+            )
+    else:
+        odd = [n for n in adj if len(adj[n]) % 2 == 1]
+        if not open_path:
+            ok = not odd
+        else:
+            ok = len(odd) == 2 and source in odd
+    if not ok:
+        kind = "path" if open_path else "circuit"
+        raise nx.NetworkXError(f"Graph has no Eulerian {kind} starting at {source}.")
@@ -1,77 +1,98 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any, Iterable
 import networkx as nx
 
 
-EXCLUDED_HIGHWAYS = {
-    "footway", "pedestrian", "steps", "path", "corridor",
-    "cycleway",
-}
-
-# Some OSM encoders put multiple values in a single string
-EXCLUDED_HIGHWAY_TOKENS = {
+# Some OSM encoders put multiple values in a single string ("cycleway;footway"),
+# so the same set is used for whole values and for individual tokens.
+EXCLUDED_HIGHWAY_TOKENS = frozenset({
     "footway", "pedestrian", "steps", "path", "corridor", "cycleway",
-}
+})
+
+
+_excluded_isdisjoint = EXCLUDED_HIGHWAY_TOKENS.isdisjoint
+_strip = str.strip
 
 
-def _as_list(v: Any) -> list[str]:
-    if v is None:
-        return []
-    if isinstance(v, list):
-        return [str(x) for x in v]
-    return [str(v)]
+@lru_cache(maxsize=512)
+def _excluded_tag_value(value: str) -> bool:
+    # Highway tags have a tiny vocabulary, so each distinct string is
+    # tokenized once and every later edge is a cache hit.
+    if ";" not in value:
+        return _strip(value) in EXCLUDED_HIGHWAY_TOKENS
+    return not _excluded_isdisjoint(map(_strip, value.split(";")))
 
 
 def _highway_has_excluded_token(highway_value: Any) -> bool:
-    vals = _as_list(highway_value)
-    for s in vals:
-        # handle "cycleway;footway" etc.
-        tokens = [t.strip() for t in s.split(";")]
-        if any(t in EXCLUDED_HIGHWAY_TOKENS for t in tokens):
-            return True
-        if s in EXCLUDED_HIGHWAYS:
-            return True
-    return False
+    if isinstance(highway_value, str):
+        return _excluded_tag_value(highway_value)
+    if highway_value is None:
+        return False
+    if not isinstance(highway_value, list):
+        highway_value = [highway_value]
+    return any(_excluded_tag_value(str(s)) for s in highway_value)
+
+
+_NO_ACCESS_VALUES = frozenset({"no", "private"})
+
+
+@lru_cache(maxsize=256)
+def _no_access_value(value: str) -> bool:
+    # Access tags have a tiny vocabulary too; "yes", "destination" etc. are
+    # normalized once and then cost one cache lookup per edge.
+    return value.strip().lower() in _NO_ACCESS_VALUES
 
 
 def is_driveable_edge(data: dict) -> bool:
     """
     Decide whether an edge is allowed in the vehicle/driving graph.
     """
-    # Exclude explicit non-driveable highway types
-    if _highway_has_excluded_token(data.get("highway")):
-        return False
+    data_get = data.get
+
+    # Cheap single-tag checks first; the highway tokenization runs last.
+    # Exclude private/no access and edges where motor vehicles are disallowed
+    # (common on foot/cycle paths)
+    for k in ("access", "motor_vehicle", "vehicle"):
+        v = data_get(k)
+        if v is None:
+            continue
+        if _no_access_value(v if v.__class__ is str else str(v)):
+            return False
 
     # Exclude parking aisles
-    if str(data.get("service", "")).strip().lower() == "parking_aisle":
+    service = data_get("service")
+    if service is not None and str(service).strip().lower() == "parking_aisle":
         return False
 
-    # Exclude where motor vehicles are disallowed (common on foot/cycle paths)
-    for k in ("motor_vehicle", "vehicle"):
-        v = data.get(k)
-        if v is not None and str(v).strip().lower() in {"no", "private"}:
-            return False
-
-    # Optional: exclude private access altogether (uncomment if desired)
-    access = str(data.get("access", "")).strip().lower()
-    if access in {"private", "no"}:
+    # Exclude explicit non-driveable highway types
+    if _highway_has_excluded_token(data_get("highway")):
         return False
 
     return True
 
 
 def filter_graph_edges(G: nx.MultiDiGraph | nx.MultiGraph) -> nx.MultiDiGraph | nx.MultiGraph:
-    H = G.__class__()  # keep MultiDiGraph vs MultiGraph
-
-    # Copy OSMnx graph metadata (crs, etc.)
-    H.graph.update(G.graph)
-
-    H.add_nodes_from(G.nodes(data=True))
-
-    for u, v, k, data in G.edges(keys=True, data=True):
-        if is_driveable_edge(data):
-            H.add_edge(u, v, key=k, **data)
-
-    return H
+    """
+    Return a mutable copy of G that keeps only driveable edges.
 
+    The copy keeps the graph class (MultiDiGraph vs MultiGraph) and the OSMnx
+    graph metadata (crs, etc.). Nodes left without any driveable edge are dropped.
+    """
+    # Walk the raw adjacency instead of an EdgeView; undirected graphs list
+    # each edge under both endpoints, so skip neighbours already visited.
+    keep = []
+    append = keep.append
+    directed = G.is_directed()
+    visited = set()
+    for u, nbrs in G._adj.items():
+        for v, keydict in nbrs.items():
+            if v in visited:
+                continue
+            for k, data in keydict.items():
+                if is_driveable_edge(data):
+                    append((u, v, k))
+        if not directed:
+            visited.add(u)
+    return G.edge_subgraph(keep).copy()
@@ -1,10 +1,33 @@
 from __future__ import annotations
 
 import math
+from itertools import starmap
 
-import gpxpy
-import gpxpy.gpx
 import networkx as nx
+import numpy as np
+import shapely
+from scipy.spatial import cKDTree
+
+from rpp.eulerian import eulerian_tour
+from rpp.graph_utils import best_parallel_edge
+
+# No pretty-print indentation: track points are the bulk of the file and
+# leading whitespace would add ~20% to the bytes formatted and written.
+_GPX_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<gpx xmlns="http://www.topografix.com/GPX/1/1" '
+    'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+    'xsi:schemaLocation="http://www.topografix.com/GPX/1/1 '
+    'http://www.topografix.com/GPX/1/1/gpx.xsd" '
+    'version="1.1" creator="rpp-solver">\n'
+    "<trk>\n"
+)
+_GPX_FOOTER = "</trk>\n</gpx>\n"
+_SEGMENT_START = "<trkseg>\n"
+_SEGMENT_END = "</trkseg>\n"
+_WRITE_BUFFER_SIZE = 1 << 20
+# Bound str.format taking (x, y), i.e. (lon, lat), in graph coordinate order.
+_format_trkpt = '<trkpt lat="{1:.7f}" lon="{0:.7f}"/>\n'.format
 
 
 def export_gpx(
@@ -19,62 +42,97 @@ def export_gpx(
         raise ValueError("end_node requires start_node for GPX export.")
     open_route = end_node is not None and start_node is not None and end_node != start_node
 
-    if start_node is None:
-        tour = list(nx.eulerian_circuit(E, keys=True))
-    else:
-        if open_route:
-            tour = list(nx.eulerian_path(E, source=start_node, keys=True))
-        else:
-            tour = list(nx.eulerian_circuit(E, source=start_node, keys=True))
-
-    gpx = gpxpy.gpx.GPX()
-    trk = gpxpy.gpx.GPXTrack()
-    gpx.tracks.append(trk)
-    seg = gpxpy.gpx.GPXTrackSegment()
-    trk.segments.append(seg)
-
-    last_point = None
-
-    for u, v, k in tour:
-        data = E.get_edge_data(u, v, k)
-        geom = data.get("geometry")
-
+    # One dict hit per endpoint instead of G.nodes[n]["x"] / ["y"] hops.
+    node_xy = _node_xy_map(G)
+    adj = E._adj
+
+    # Split the tour into edges with and without geometry; the latter are
+    # emitted as their (u, v) node coordinates.
+    geoms = []
+    geometry_ends = []
+    plain_xy = []
+    has_geometry = []
+    # The tour list is only referenced by this loop and is freed after it.
+    for u, v, k in eulerian_tour(E, source=start_node, open_path=open_route):
+        geom = adj[u][v][k].get("geometry")
         if geom is None:
-            coords = [
-                (G.nodes[u]["x"], G.nodes[u]["y"]),
-                (G.nodes[v]["x"], G.nodes[v]["y"]),
-            ]
+            has_geometry.append(False)
+            plain_xy.append((*node_xy[u], *node_xy[v]))
         else:
-            coords = list(geom.coords)
-
-            ux, uy = G.nodes[u]["x"], G.nodes[u]["y"]
-            vx, vy = G.nodes[v]["x"], G.nodes[v]["y"]
-
-            start = coords[0]
-            end = coords[-1]
-
-            du_start = dist2(start, (ux, uy))
-            dv_start = dist2(start, (vx, vy))
-            du_end = dist2(end, (ux, uy))
-            dv_end = dist2(end, (vx, vy))
-
-            if not (du_start <= dv_start and dv_end <= du_end):
-                coords.reverse()
-
-        for x, y in coords:
-            pt = (y, x)
-
-            # avoid zero-length or jump duplicates
-            if last_point != pt:
-                seg.points.append(gpxpy.gpx.GPXTrackPoint(y, x))
-                last_point = pt
-
-    with open(filename, "w") as f:
-        f.write(gpx.to_xml())
-
-
-def dist2(a, b):
-    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2
+            has_geometry.append(True)
+            geoms.append(geom)
+            geometry_ends.append((*node_xy[u], *node_xy[v]))
+
+    # One bulk read of every polyline's coordinate buffer instead of a
+    # Python tuple per vertex per edge.
+    coords, owner = shapely.get_coordinates(geoms, return_index=True)
+    counts = np.bincount(owner, minlength=len(geoms))
+    first = np.cumsum(counts) - counts
+    last = first + counts - 1
+
+    ends = np.array(geometry_ends, dtype=np.float64).reshape(-1, 4)
+    ends = np.hstack([coords[first], coords[last], ends])
+    reverse = _reversed_mask(ends)
+    # Flip reversed polylines in place by mirroring each vertex's offset.
+    source = np.arange(len(coords))
+    source = np.where(reverse[owner], first[owner] + last[owner] - source, source)
+    coords = coords[source]
+
+    # Lay both kinds of edge out in travel order.
+    has_geometry = np.array(has_geometry, dtype=bool)
+    lengths = np.full(len(has_geometry), 2)
+    lengths[has_geometry] = counts
+    offsets = np.cumsum(lengths) - lengths
+    xy = np.empty((int(lengths.sum()), 2), dtype=np.float64)
+    xy[offsets[has_geometry][owner] + np.arange(len(coords)) - first[owner]] = coords
+    plain = np.array(plain_xy, dtype=np.float64).reshape(-1, 4)
+    plain_offsets = offsets[~has_geometry]
+    xy[plain_offsets] = plain[:, :2]
+    xy[plain_offsets + 1] = plain[:, 2:]
+
+    if np.isnan(xy).any():
+        raise ValueError("Node coordinate attributes x/y missing for GPX export.")
+    # avoid zero-length or jump duplicates
+    keep = np.ones(len(xy), dtype=bool)
+    keep[1:] = (xy[1:] != xy[:-1]).any(axis=1)
+
+    with open(filename, "w", encoding="utf-8", buffering=_WRITE_BUFFER_SIZE) as f:
+        f.write(_GPX_HEADER)
+        f.write(_SEGMENT_START)
+        f.writelines(starmap(_format_trkpt, xy[keep].tolist()))
+        f.write(_SEGMENT_END)
+        f.write(_GPX_FOOTER)
+
+
+def _reversed_mask(ends: np.ndarray) -> np.ndarray:
+    """
+    Vectorized _is_reversed over rows of (start_x, start_y, end_x, end_y,
+    ux, uy, vx, vy).
+    """
+    sx, sy, ex, ey, ux, uy, vx, vy = ends.T
+    dx = vx - ux
+    dy = vy - uy
+    mx = ux + vx
+    my = uy + vy
+    start_side = (2 * sx - mx) * dx + (2 * sy - my) * dy
+    end_side = (2 * ex - mx) * dx + (2 * ey - my) * dy
+    return ~((start_side <= 0) & (end_side >= 0))
+
+
+def _is_reversed(start, end, ux, uy, vx, vy) -> bool:
+    """
+    True unless the geometry starts nearer to u and ends nearer to v.
+
+    |p-u|^2 - |p-v|^2 == (2p - u - v) . (v - u), so each "nearer" test is a
+    single dot product against the u->v direction instead of two distances.
+    """
+    dx = vx - ux
+    dy = vy - uy
+    mx = ux + vx
+    my = uy + vy
+    start_side = (2 * start[0] - mx) * dx + (2 * start[1] - my) * dy
+    end_side = (2 * end[0] - mx) * dx + (2 * end[1] - my) * dy
+    return not (start_side <= 0 and end_side >= 0)
 
 
 def select_start_node(
@@ -83,8 +141,9 @@ def select_start_node(
     start: tuple[float, float],
 ) -> tuple[int, tuple[float, float], float, str]:
     component_nodes, component_strategy = _select_component_nodes(E)
-    node, coords, distance = _select_nearest_node(component_nodes, G, start)
-    return node, coords, distance, component_strategy
+    index = _snap_index(G, component_nodes)
+    node, snapped, distance = _select_nearest_node(index, start)
+    return node, snapped, distance, component_strategy
 
 
 def select_end_node(
@@ -93,8 +152,9 @@ def select_end_node(
     end: tuple[float, float],
 ) -> tuple[int, tuple[float, float], float, str]:
     component_nodes, component_strategy = _select_component_nodes(E)
-    node, coords, distance = _select_nearest_node(component_nodes, G, end)
-    return node, coords, distance, component_strategy
+    index = _snap_index(G, component_nodes)
+    node, snapped, distance = _select_nearest_node(index, end)
+    return node, snapped, distance, component_strategy
 
 
 def select_endpoint_nodes(
@@ -112,10 +172,11 @@ def select_endpoint_nodes(
     str,
 ]:
     component_nodes, component_strategy = _select_component_nodes(E)
-    start_node, start_coords, start_distance = _select_nearest_node(component_nodes, G, start)
+    index = _snap_index(G, component_nodes)
+    start_node, start_coords, start_distance = _select_nearest_node(index, start)
     if end is None:
         return start_node, start_coords, start_distance, None, None, None, component_strategy
-    end_node, end_coords, end_distance = _select_nearest_node(component_nodes, G, end)
+    end_node, end_coords, end_distance = _select_nearest_node(index, end)
     return (
         start_node,
         start_coords,
@@ -127,7 +188,7 @@ def select_endpoint_nodes(
     )
 
 
-def _select_component_nodes(E: nx.MultiGraph) -> tuple[set[int], str]:
+def _select_component_nodes(E: nx.MultiGraph) -> tuple[frozenset[int], str]:
     if E.number_of_nodes() == 0:
         raise ValueError("Cannot select start node from empty graph.")
 
@@ -139,37 +200,89 @@ def _select_component_nodes(E: nx.MultiGraph) -> tuple[set[int], str]:
     if not components:
         raise ValueError("Cannot select start node from graph with no components.")
 
-    largest = max(components, key=len)
-    return set(largest), "largest_component"
+    return frozenset(max(components, key=len)), "largest_component"
+
+
+def node_coordinate_arrays(G: nx.MultiGraph) -> tuple[dict, np.ndarray, np.ndarray]:
+    """
+    Return (node -> row index, lats, lons) for every node in G.
+    Nodes without x/y get NaN coordinates.
+    """
+    index = {}
+    lats = []
+    lons = []
+    for i, (node, node_data) in enumerate(G.nodes(data=True)):
+        index[node] = i
+        lats.append(node_data.get("y", math.nan))
+        lons.append(node_data.get("x", math.nan))
+    return index, np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+
+
+def _node_xy_map(G: nx.MultiGraph) -> dict:
+    """
+    Return {node: (x, y)} for every node in G; nodes without x/y map to NaN.
+    Built once per export call.
+    """
+    return {
+        node: (node_data.get("x", math.nan), node_data.get("y", math.nan))
+        for node, node_data in G.nodes(data=True)
+    }
+
+
+def _component_coordinates(
+    component_nodes: frozenset[int],
+    G: nx.MultiGraph,
+) -> tuple[list[int], np.ndarray, np.ndarray]:
+    """
+    Extract node ids and lat/lon arrays for the component nodes present in G.
+    """
+    index, lats, lons = node_coordinate_arrays(G)
+    nodes = [node for node in component_nodes if node in index]
+    rows = np.fromiter((index[node] for node in nodes), dtype=np.intp, count=len(nodes))
+    node_lats = lats[rows]
+    node_lons = lons[rows]
+    if np.isnan(node_lats).any() or np.isnan(node_lons).any():
+        raise ValueError("Node coordinate attributes x/y missing for point snapping.")
+    return nodes, node_lats, node_lons
+
+
+def _snap_index(
+    G: nx.MultiGraph,
+    component_nodes: frozenset[int],
+) -> tuple[list[int], np.ndarray, np.ndarray, cKDTree | None]:
+    """
+    Return (nodes, lats, lons, KD-tree) for the component. select_endpoint_nodes
+    builds it once and snaps both points against it.
+
+    The tree holds unit-sphere vectors: chord length grows monotonically with
+    great-circle distance, so its nearest neighbour is the haversine nearest.
+    """
+    nodes, lats, lons = _component_coordinates(component_nodes, G)
+    tree = cKDTree(_unit_vectors(lats, lons)) if nodes else None
+    return nodes, lats, lons, tree
+
+
+def _unit_vectors(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    phi = np.radians(lats)
+    lam = np.radians(lons)
+    cos_phi = np.cos(phi)
+    return np.column_stack((cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)))
 
 
 def _select_nearest_node(
-    component_nodes: set[int],
-    G: nx.MultiGraph,
+    index: tuple[list[int], np.ndarray, np.ndarray, cKDTree | None],
     target: tuple[float, float],
 ) -> tuple[int, tuple[float, float], float]:
-    target_lat, target_lon = target
-    best_node = None
-    best_distance = None
-    best_coords = None
-    for node in component_nodes:
-        node_data = G.nodes.get(node)
-        if node_data is None:
-            continue
-        if "x" not in node_data or "y" not in node_data:
-            raise ValueError("Node coordinate attributes x/y missing for point snapping.")
-        node_lon = node_data["x"]
-        node_lat = node_data["y"]
-        distance = haversine_m(target_lat, target_lon, node_lat, node_lon)
-        if best_distance is None or distance < best_distance:
-            best_node = node
-            best_distance = distance
-            best_coords = (node_lat, node_lon)
-
-    if best_node is None or best_distance is None or best_coords is None:
+    nodes, lats, lons, tree = index
+    if not nodes:
         raise ValueError("Unable to snap point: no nodes with coordinates found.")
 
-    return best_node, best_coords, best_distance
+    target_lat, target_lon = target
+    _, best = tree.query(_unit_vectors(np.array([target_lat]), np.array([target_lon]))[0])
+    best_lat = float(lats[best])
+    best_lon = float(lons[best])
+    distance = haversine_m(target_lat, target_lon, best_lat, best_lon)
+    return nodes[best], (best_lat, best_lon), distance
 
 
 def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -180,51 +293,57 @@ def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     dlambda = math.radians(lon2 - lon1)
 
     a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    c = 2 * math.asin(math.sqrt(min(a, 1.0)))
     return radius_m * c
 
 
 def export_edge_list_gpx(G: nx.MultiGraph, edges, filename: str):
-    gpx = gpxpy.gpx.GPX()
-    trk = gpxpy.gpx.GPXTrack()
-    gpx.tracks.append(trk)
-
-    for u, v in edges:
-        data = _best_edge_data(G, u, v)
-        geom = data.get("geometry")
-        ux, uy = G.nodes[u]["x"], G.nodes[u]["y"]
-        vx, vy = G.nodes[v]["x"], G.nodes[v]["y"]
-        if geom is None:
-            coords = [(ux, uy), (vx, vy)]
-        else:
-            coords = list(geom.coords)
-
-        start = coords[0]
-        end = coords[-1]
-
-        du_start = dist2(start, (ux, uy))
-        dv_start = dist2(start, (vx, vy))
-        du_end = dist2(end, (ux, uy))
-        dv_end = dist2(end, (vx, vy))
-
-        if not (du_start <= dv_start and dv_end <= du_end):
-            coords.reverse()
-
-        seg = gpxpy.gpx.GPXTrackSegment()
-        trk.segments.append(seg)
-        for x, y in coords:
-            seg.points.append(gpxpy.gpx.GPXTrackPoint(y, x))
-
-    with open(filename, "w") as f:
-        f.write(gpx.to_xml())
+    with open(filename, "w", encoding="utf-8", buffering=_WRITE_BUFFER_SIZE) as f:
+        write = f.write
+        write(_GPX_HEADER)
+
+        node_xy = _node_xy_map(G)
+        last_point = None
+        # Blocker lists can repeat edges; pick each (u, v) edge only once.
+        best_edges = {}
+        for u, v in edges:
+            data = best_edges.get((u, v))
+            if data is None:
+                data = best_edges[u, v] = _best_edge_data(G, u, v)
+            geom = data.get("geometry")
+            ux, uy = node_xy[u]
+            vx, vy = node_xy[v]
+            if math.isnan(ux) or math.isnan(vx):
+                raise ValueError("Node coordinate attributes x/y missing for GPX export.")
+            if geom is None:
+                coords = ((ux, uy), (vx, vy))
+            else:
+                coords = geom.coords
+
+            first = coords[0]
+            last = coords[-1]
+            points = iter(coords)
+            if _is_reversed(first, last, ux, uy, vx, vy):
+                first, last = last, first
+                points = reversed(coords)
+
+            # Contiguous edges share one segment; start a new one only at a gap.
+            if first == last_point:
+                next(points)
+            else:
+                if last_point is not None:
+                    write(_SEGMENT_END)
+                write(_SEGMENT_START)
+            f.writelines(starmap(_format_trkpt, points))
+            last_point = last
+
+        if last_point is not None:
+            write(_SEGMENT_END)
+        write(_GPX_FOOTER)
 
 
 def _best_edge_data(G: nx.MultiGraph, u, v):
     edge_candidates = G.get_edge_data(u, v)
     if not edge_candidates:
         raise RuntimeError(f"No edge data in G for ({u}, {v})")
-
-    with_geom = [d for d in edge_candidates.values() if d.get("geometry") is not None]
-    if with_geom:
-        return min(with_geom, key=lambda d: d.get("weight", d.get("length", 1.0)))
-    return min(edge_candidates.values(), key=lambda d: d.get("weight", d.get("length", 1.0)))
+    return best_parallel_edge(edge_candidates)[0]
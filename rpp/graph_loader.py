@@ -21,16 +21,17 @@ def load_graphs(osm_file: str, ignore_oneway: bool = False):
     for u, v, k, data in G_filt.edges(keys=True, data=True):
         data["weight"] = data.get("length", 1.0)
 
+    # Service graphs for required edges + geometry lookup
+    G_service_undirected = ox.convert.to_undirected(G_filt)
+    G_service_directed = G_filt
+
     # Driving graph: directed or undirected depending on flag
     if ignore_oneway:
-        # Undirected driving graph ignores one-ways for shortest paths
-        G_drive = ox.convert.to_undirected(G_filt)
+        # Undirected driving graph ignores one-ways for shortest paths. It is
+        # the same conversion as the undirected service graph, so share it.
+        G_drive = G_service_undirected
     else:
         # Directed driving graph respects one-ways
         G_drive = G_filt
 
-    # Service graphs for required edges + geometry lookup
-    G_service_undirected = ox.convert.to_undirected(G_filt)
-    G_service_directed = G_filt
-
     return G_drive, G_service_undirected, G_service_directed
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+
+def best_parallel_edge(edge_candidates: dict) -> tuple[dict, float]:
+    """
+    Pick among the parallel edges' data dicts for one (u, v): a candidate
+    with geometry beats any without, otherwise the lighter one wins, and the
+    first seen wins ties. Returns (data, weight); weight falls back to
+    length, then 1.0.
+    """
+    best = None
+    best_weight = 0.0
+    best_has_geom = False
+    for d in edge_candidates.values():
+        w = d.get("weight")
+        if w is None:
+            w = d.get("length", 1.0)
+        has_geom = d.get("geometry") is not None
+        if best is None or has_geom > best_has_geom or (has_geom == best_has_geom and w < best_weight):
+            best = d
+            best_weight = w
+            best_has_geom = has_geom
+    return best, best_weight
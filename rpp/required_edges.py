@@ -2,23 +2,16 @@ from rpp.filters import is_driveable_edge
 import networkx as nx
 
 # Streets that must be serviced
-REQUIRED_HIGHWAYS = {
+REQUIRED_HIGHWAYS = frozenset({
     "residential",
     "living_street",
     "tertiary",
-    "unclassified"
-}
+    "unclassified",
+})
 
 def build_required_graph_undirected(G_service_undirected: nx.MultiGraph) -> nx.Graph:
     R = nx.Graph()
-    for u, v, data in G_service_undirected.edges(data=True):
-        if not is_driveable_edge(data):
-            continue
-        hw = data.get("highway")
-        if isinstance(hw, list):
-            hw = hw[0]
-        if hw in REQUIRED_HIGHWAYS:
-            R.add_edge(u, v, weight=data["weight"])
+    R.add_weighted_edges_from(_required_edges(G_service_undirected, directed=False))
     return R
 
 
@@ -26,12 +19,29 @@ def build_required_graph_directed(
     G_service_directed: nx.MultiDiGraph,
 ) -> nx.DiGraph:
     R = nx.DiGraph()
-    for u, v, _key, data in G_service_directed.edges(keys=True, data=True):
-        if not is_driveable_edge(data):
-            continue
-        hw = data.get("highway")
-        if isinstance(hw, list):
-            hw = hw[0]
-        if hw in REQUIRED_HIGHWAYS:
-            R.add_edge(u, v, weight=data["weight"])
+    R.add_weighted_edges_from(_required_edges(G_service_directed, directed=True))
     return R
+
+
+def _required_edges(G: nx.MultiGraph, *, directed: bool):
+    """
+    Yield (u, v, weight) for every driveable required edge of G.
+    """
+    is_required = REQUIRED_HIGHWAYS.__contains__
+    # Walk the raw adjacency; each undirected edge is listed under both
+    # endpoints, so skip neighbours whose adjacency was already walked.
+    visited = set()
+    for u, nbrs in G._adj.items():
+        for v, keydict in nbrs.items():
+            if v in visited:
+                continue
+            for data in keydict.values():
+                if not is_driveable_edge(data):
+                    continue
+                hw = data.get("highway")
+                if type(hw) is list:
+                    hw = hw[0]
+                if is_required(hw):
+                    yield u, v, data["weight"]
+        if not directed:
+            visited.add(u)
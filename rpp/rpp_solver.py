@@ -1,13 +1,34 @@
 from __future__ import annotations
 
-import itertools
+import math
+import os
+from collections import Counter
+
 import networkx as nx
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from rpp.graph_utils import best_parallel_edge
+from rpp.shortest_paths import distance_matrix, drive_csr, nearest_targets, shortest_paths
+
+# Odd-node count above which matching starts on a k-nearest-neighbour graph.
+_SPARSE_MATCHING_MIN_NODES = 200
+_MATCHING_NEIGHBORS = 8
+# Matching weights are road distances in metres scaled to integers.
+_MATCHING_WEIGHT_SCALE = 1000
+# Nearest other representatives each RPP component offers as connector
+# candidates.
+_CONNECTOR_NEIGHBORS = 8
 
 
 def build_rpp_base_graph(
     G_drive: nx.Graph,
     G_service: nx.MultiGraph,
     R: nx.Graph,
+    *,
+    memo: dict | None = None,
+    version=None,
+    workers: int = 1,
 ) -> nx.MultiGraph:
     """
     Solve an RPP-like problem where:
@@ -20,41 +41,144 @@ def build_rpp_base_graph(
             weight: float
             geometry: shapely LineString or None (should be mostly present)
             kind: "required" | "connector" | "duplicate"
+
+    memo is an optional dict owned by the caller. The built graph is kept
+    in it, and later calls with the same G_drive, G_service, required edges
+    and version get a copy instead of a rebuild. Pass a new version after
+    changing weights or geometry on either graph.
+
+    workers > 1 runs the connector Dijkstra sweeps in a process pool.
     """
+    key = None
+    if memo is not None:
+        key = _rpp_base_key(G_drive, G_service, R, version)
+        entry = memo.get(key)
+        if entry is not None:
+            return entry[-1].copy()
 
     # ---- Step 0: connect required-edge components (using directed driving graph) ----
-    components = list(nx.connected_components(R))
-    reps = [next(iter(c)) for c in components]
-
-    connector_paths = []
-    for a, b in zip(reps[:-1], reps[1:]):
-        # Directed shortest path respects one-ways
-        try:
-            _, path = nx.single_source_dijkstra(G_drive, a, b, weight="weight")
-        except nx.NetworkXNoPath:
-            # If the directed graph cannot connect components due to one-ways,
-            # try the reverse direction (common around one-way rings), else fail clearly.
-            try:
-                _, path = nx.single_source_dijkstra(G_drive, b, a, weight="weight")
-                path = list(reversed(path))
-            except nx.NetworkXNoPath as e:
-                raise RuntimeError(f"No directed path between required components: {a} <-> {b}") from e
+    # One representative per component, in R's node order, without
+    # building the component node sets.
+    components = _DisjointSet(R)
+    for u, v in R.edges():
+        components.union(u, v)
+    reps = list(dict.fromkeys(components.find(n) for n in R))
 
-        connector_paths.append(path)
+    # Directed shortest paths respect one-ways
+    connector_paths = _spanning_connector_paths(drive_csr(G_drive), reps, workers)
+    for a, b, path in connector_paths:
+        if path is None:
+            raise RuntimeError(f"No directed path between required components: {a} <-> {b}")
 
     # ---- Step 1: Build multigraph E with geometry (from service graph) ----
     E = nx.MultiGraph()
+    # (u, v) -> (weight, geometry) picks, local to this build.
+    best_edges = {}
 
     # Required edges
-    for u, v in R.edges():
-        add_edge_with_geometry(E, G_service, u, v, kind="required")
+    E.add_edges_from(
+        _edges_with_geometry(G_service, R.edges(), "required", best_edges, "G_service")
+    )
 
     # Connector edges to join components
-    for path in connector_paths:
-        for u, v in zip(path[:-1], path[1:]):
-            add_edge_with_geometry(E, G_service, u, v, kind="connector")
+    connector_steps = (step for _a, _b, path in connector_paths for step in zip(path, path[1:]))
+    E.add_edges_from(
+        _edges_with_geometry(G_service, connector_steps, "connector", best_edges, "G_service")
+    )
 
-    return E
+    if memo is None:
+        return E
+    # The entry keeps both graphs alive, so their ids in the key stay unique.
+    memo[key] = (G_drive, G_service, E)
+    return E.copy()
+
+
+def _rpp_base_key(G_drive: nx.Graph, G_service: nx.MultiGraph, R: nx.Graph, version) -> tuple:
+    return (id(G_drive), id(G_service), version, frozenset(R), frozenset(R.edges()))
+
+
+def _connector_paths(drive: tuple, reps: list, workers: int = 1) -> list:
+    """
+    Connector (a, b, path) triples along the chain of consecutive component
+    representatives, with path None where no path exists in either
+    direction.
+
+    If one-ways block a -> b, the b -> a path is used reversed (common
+    around one-way rings). Each representative is swept once with scipy's
+    csgraph Dijkstra rather than one networkx search per pair.
+    """
+    steps = list(zip(reps[:-1], reps[1:]))
+    found = shortest_paths(drive, steps, workers, skip_unreachable=True)
+    backward = [(b, a) for a, b in steps if (a, b) not in found]
+    found.update(shortest_paths(drive, backward, workers, skip_unreachable=True))
+
+    connectors = []
+    for a, b in steps:
+        path = found.get((a, b))
+        if path is None and (b, a) in found:
+            path = found[b, a][::-1]
+        connectors.append((a, b, path))
+    return connectors
+
+
+def _spanning_connector_paths(drive: tuple, reps: list, workers: int = 1) -> list:
+    """
+    Connector (a, b, path) triples along a minimum spanning tree of the
+    component representatives' shortest G_drive distances. If no path
+    joins some part of the tree to the rest, a single (a, b, None) triple
+    names one of the missing links.
+
+    The tree is taken over a sparse candidate graph: each representative's
+    _CONNECTOR_NEIGHBORS nearest others, in whichever direction is shorter.
+    While that leaves the tree in pieces, every representative adds its
+    nearest partner outside its own piece (a Boruvka round).
+    """
+    n = len(reps)
+    if n < 2:
+        return []
+
+    # (i, j), i < j -> (distance, source, target) of the shorter direction.
+    candidates = {}
+    labels = np.arange(n)
+    k = _CONNECTOR_NEIGHBORS
+    pieces = n
+    while True:
+        nearest, nearest_dist = nearest_targets(drive, reps, reps, k, workers, groups=(labels, labels))
+        for i, (row, row_dist) in enumerate(zip(nearest.tolist(), nearest_dist.tolist())):
+            for j, d in zip(row, row_dist):
+                if j < 0:
+                    break
+                key = (i, j) if i < j else (j, i)
+                if key not in candidates or d < candidates[key][0]:
+                    candidates[key] = (d, i, j)
+
+        K = nx.Graph()
+        K.add_nodes_from(range(n))
+        K.add_weighted_edges_from((i, j, d) for (i, j), (d, _s, _t) in candidates.items())
+        tree = [tuple(sorted(edge)) for edge in nx.minimum_spanning_edges(K, data=False)]
+
+        pieces_left = n - len(tree)
+        if pieces_left == 1 or pieces_left == pieces:
+            break
+        pieces = pieces_left
+        forest = _DisjointSet(range(n))
+        for i, j in tree:
+            forest.union(i, j)
+        labels = np.array([forest.find(i) for i in range(n)])
+        k = 1
+
+    routes = [candidates[edge][1:] for edge in tree]
+    found = shortest_paths(drive, [(reps[s], reps[t]) for s, t in routes], workers)
+    connectors = []
+    for (i, j), (s, t) in zip(tree, routes):
+        path = found[reps[s], reps[t]]
+        connectors.append((reps[i], reps[j], path if s == i else path[::-1]))
+
+    if len(tree) < n - 1:
+        joined = nx.node_connected_component(nx.Graph(tree), 0) if tree else {0}
+        apart = next(i for i in range(n) if i not in joined)
+        connectors.append((reps[0], reps[apart], None))
+    return connectors
 
 
 def solve_rpp(
@@ -65,6 +189,9 @@ def solve_rpp(
     start_node=None,
     end_node=None,
     base_graph: nx.MultiGraph | None = None,
+    base_memo: dict | None = None,
+    base_version=None,
+    workers: int = 1,
 ) -> nx.MultiGraph:
     """
     Solve an RPP-like problem where:
@@ -82,7 +209,13 @@ def solve_rpp(
     if end_node is not None and start_node is None:
         raise ValueError("end_node requires start_node.")
 
-    E = base_graph.copy() if base_graph is not None else build_rpp_base_graph(G_drive, G_service, R)
+    if base_graph is not None:
+        E = base_graph.copy()
+    else:
+        # base_memo/base_version: see build_rpp_base_graph's memo/version.
+        E = build_rpp_base_graph(
+            G_drive, G_service, R, memo=base_memo, version=base_version, workers=workers
+        )
 
     if start_node is not None and start_node not in E.nodes:
         raise ValueError(f"start_node {start_node} is not present in the routing graph.")
@@ -92,78 +225,228 @@ def solve_rpp(
     open_route = end_node is not None and start_node is not None and end_node != start_node
 
     # ---- Step 2: Fix odd degrees via min-weight matching (distances from directed graph) ----
-    odd = {n for n in E.nodes if E.degree(n) % 2 == 1}
-    if open_route:
-        odd ^= {start_node, end_node}
+    odd_degree = {n for n, d in E.degree() if d % 2 == 1}
+    odd = odd_degree ^ {start_node, end_node} if open_route else set(odd_degree)
 
     if len(odd) % 2 != 0:
         raise RuntimeError(f"Odd node count is not even: {len(odd)}")
 
     odd_list = sorted(odd)
+    drive = drive_csr(G_drive)
 
-    # Build complete graph on odd nodes with directed shortest-path distances
-    K = nx.Graph()
-    sp_cache = {}
-
-    for u, v in itertools.combinations(odd_list, 2):
-        try:
-            dist, path = nx.single_source_dijkstra(G_drive, u, v, weight="weight")
-            K.add_edge(u, v, weight=dist)
-            sp_cache[(u, v)] = path
-        except nx.NetworkXNoPath:
-            # If u->v doesn't exist due to direction, try v->u and reverse the path
-            try:
-                dist, path = nx.single_source_dijkstra(G_drive, v, u, weight="weight")
-                K.add_edge(u, v, weight=dist)
-                sp_cache[(u, v)] = list(reversed(path))
-            except nx.NetworkXNoPath:
-                # Leave this pair out; matching will fail if graph becomes disconnected.
-                pass
-
-    # Ensure matching graph is connected enough
-    if K.number_of_nodes() != len(odd_list):
-        missing = set(odd_list) - set(K.nodes())
-        raise RuntimeError(f"Matching graph missing nodes (no paths found): {sorted(missing)[:10]}...")
+    # Nothing to match when every degree is already even.
+    if odd_list:
+        matching, pair_route = _match_odd_nodes(drive, odd_list, workers)
+    else:
+        matching, pair_route = set(), {}
 
-    matching = nx.algorithms.matching.min_weight_matching(K, weight="weight")
+    # Components of E, kept current while the matched paths go in.
+    components = _DisjointSet(E)
+    for a, b in E.edges():
+        components.union(a, b)
 
     # Add matched shortest paths as DUPLICATED traversals
-    for u, v in matching:
-        # Normalize for cache
-        key = (u, v) if (u, v) in sp_cache else (v, u)
-        path = sp_cache[key]
+    matched = [(u, v) if (u, v) in pair_route else (v, u) for u, v in matching]
+    routed_paths = shortest_paths(drive, [pair_route[key] for key in matched], workers)
+    duplicate_steps = []
+    for key in matched:
+        u, v = key
+        path = routed_paths[pair_route[key]]
+        if pair_route[key] != key:
+            path = path[::-1]
+
+        duplicate_steps.extend(zip(path, path[1:]))
+        for n in path[1:]:
+            components.union(path[0], n)
+        # A duplicated path flips the degree parity of its two ends only.
+        odd_degree ^= {u, v}
 
-        for a, b in zip(path[:-1], path[1:]):
-            add_edge_with_geometry(E, G_service, a, b, kind="duplicate")
+    # One bulk insert for all matched paths, in path order.
+    best_edges = {}
+    E.add_edges_from(
+        _edges_with_geometry(G_service, duplicate_steps, "duplicate", best_edges, "G_service")
+    )
 
     # ---- Step 3: final invariants ----
-    if not nx.is_connected(E):
+    # RPP_DEBUG_CHECKS=1 re-derives connectivity with a full traversal.
+    connected = nx.is_connected(E) if os.environ.get("RPP_DEBUG_CHECKS") else components.count == 1
+    if not connected:
         raise RuntimeError("RPP result is not connected (after connectors + matching).")
 
+    # E is connected, so the tracked parity alone decides the Eulerian checks.
     if open_route:
-        odd_after = {n for n in E.nodes if E.degree(n) % 2 == 1}
         expected = {start_node, end_node}
-        if odd_after != expected:
+        if odd_degree != expected:
             raise RuntimeError(
                 "RPP open route is not valid. "
-                f"Odd nodes remaining: {sorted(odd_after)}; expected {sorted(expected)}"
+                f"Odd nodes remaining: {sorted(odd_degree)}; expected {sorted(expected)}"
             )
-        if not nx.has_eulerian_path(E):
-            raise RuntimeError("RPP open route has no Eulerian path.")
     else:
-        if not nx.is_eulerian(E):
-            odd_after = [n for n in E.nodes if E.degree(n) % 2 == 1]
-            raise RuntimeError(f"RPP result is not Eulerian. Odd nodes remaining: {len(odd_after)}")
+        if odd_degree:
+            raise RuntimeError(f"RPP result is not Eulerian. Odd nodes remaining: {len(odd_degree)}")
 
     return E
 
 
+def _match_odd_nodes(drive: tuple, odd_list: list, workers: int, *, bounded: bool = True):
+    """
+    Min-weight matching of the odd nodes by shortest-path distance on
+    G_drive. Returns the matching and, per matched pair key (u, v) in
+    odd_list order, the (source, target) direction its distance was
+    measured in.
+
+    Large instances (see _odd_node_matching) search only a radius around
+    each odd node first: nodes that find too few partners in it are swept
+    again without a bound, and the whole step is redone unbounded if the
+    matching comes out imperfect.
+    """
+    limit = None
+    if bounded and len(odd_list) > _SPARSE_MATCHING_MIN_NODES:
+        limit = _matching_search_radius(drive, odd_list)
+
+    # One Dijkstra sweep per odd node instead of one per odd pair, straight
+    # into a dense odd x odd distance matrix.
+    dist = distance_matrix(drive, odd_list, odd_list, workers, limit=limit)
+    if limit is not None:
+        # Each row includes the source itself at distance 0.
+        sparse = np.flatnonzero(np.isfinite(dist).sum(axis=1) <= _MATCHING_NEIGHBORS)
+        if len(sparse):
+            dist[sparse] = distance_matrix(drive, [odd_list[i] for i in sparse], odd_list, workers)
+
+    # Pairs without a path either way stay at inf and are left out.
+    pair_dist, forward = _pair_distances(dist)
+
+    # Ensure matching graph is connected enough
+    unpaired = ~np.isfinite(pair_dist).any(axis=1)
+    if unpaired.any():
+        missing = {odd_list[i] for i in np.flatnonzero(unpaired)}
+        raise RuntimeError(f"Matching graph missing nodes (no paths found): {sorted(missing)[:10]}...")
+
+    matching = _odd_node_matching(odd_list, pair_dist)
+    if limit is not None and 2 * len(matching) != len(odd_list):
+        # The radius hid pairs that a perfect matching needs.
+        return _match_odd_nodes(drive, odd_list, workers, bounded=False)
+
+    # Paths are only reconstructed for the matched pairs.
+    position = {n: i for i, n in enumerate(odd_list)}
+    pair_route = {}
+    for u, v in matching:
+        i, j = sorted((position[u], position[v]))
+        u, v = odd_list[i], odd_list[j]
+        pair_route[(u, v)] = (u, v) if forward[i, j] else (v, u)
+    return matching, pair_route
+
+
+def _pair_distances(dist: np.ndarray):
+    """
+    Symmetric pair costs from a square directed distance matrix, and the
+    isfinite(dist) mask. Pair (i, j), i < j, costs the i -> j distance, or
+    j -> i when one-ways rule out the forward direction (its path is then
+    used reversed). Pairs with neither, and the diagonal, are inf.
+    """
+    forward = np.isfinite(dist)
+    pair_dist = np.triu(np.where(forward, dist, dist.T), k=1)
+    pair_dist[np.tril_indices(len(dist))] = np.inf
+    return np.minimum(pair_dist, pair_dist.T), forward
+
+
+def _matching_search_radius(drive: tuple, odd_list: list) -> float:
+    """
+    Search radius for the bounded odd-pair sweeps: twice the distance from
+    one odd node to its _MATCHING_NEIGHBORS-th nearest odd node.
+    """
+    dist = distance_matrix(drive, odd_list[:1], odd_list)[0]
+    dist = np.sort(dist[np.isfinite(dist)])
+    if len(dist) <= _MATCHING_NEIGHBORS:
+        return math.inf
+    return 2 * float(dist[_MATCHING_NEIGHBORS])
+
+
+def _odd_node_matching(odd_list: list, pair_dist: np.ndarray) -> set:
+    """
+    Min-weight matching of the odd nodes over the symmetric pair_dist
+    matrix (inf for pairs without a path, and on the diagonal).
+
+    Above _SPARSE_MATCHING_MIN_NODES odd nodes the matching first runs on a
+    k-nearest-neighbour subgraph (k >= log2 of the node count), doubling k
+    until the matching is perfect; the complete pair graph is the last
+    resort. Smaller instances go straight to the complete graph.
+    """
+    n = len(odd_list)
+    if n > _SPARSE_MATCHING_MIN_NODES:
+        k = max(_MATCHING_NEIGHBORS, math.ceil(math.log2(n)))
+    else:
+        k = n - 1
+
+    # Integer millimetre weights keep networkx's blossom code on exact
+    # integer arithmetic instead of floats.
+    finite = np.isfinite(pair_dist)
+    weight = np.zeros(pair_dist.shape, dtype=np.int64)
+    weight[finite] = np.rint(pair_dist[finite] * _MATCHING_WEIGHT_SCALE)
+
+    while True:
+        if k >= n - 1:
+            rows, cols = np.nonzero(np.triu(finite, k=1))
+        else:
+            # Stable sort keeps the lower-index neighbour on distance ties.
+            nearest = np.argsort(pair_dist, axis=1, kind="stable")[:, :k]
+            rows = np.repeat(np.arange(n), k)
+            cols = nearest.ravel()
+            keep = finite[rows, cols]
+            rows, cols = rows[keep], cols[keep]
+
+        K = nx.Graph()
+        K.add_weighted_edges_from(
+            (odd_list[i], odd_list[j], w)
+            for i, j, w in zip(rows.tolist(), cols.tolist(), weight[rows, cols].tolist())
+        )
+        matching = nx.algorithms.matching.min_weight_matching(K, weight="weight")
+        if 2 * len(matching) == n or k >= n - 1:
+            return matching
+        k *= 2
+
+
+class _DisjointSet:
+    """Union-find with path halving and union by size; count is the number of sets."""
+
+    def __init__(self, nodes=()):
+        self.parent = {n: n for n in nodes}
+        self.size = dict.fromkeys(self.parent, 1)
+        self.count = len(self.parent)
+
+    def find(self, n):
+        parent = self.parent
+        if n not in parent:
+            parent[n] = n
+            self.size[n] = 1
+            self.count += 1
+            return n
+        while parent[n] != n:
+            parent[n] = parent[parent[n]]
+            n = parent[n]
+        return n
+
+    def union(self, a, b) -> bool:
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        self.count -= 1
+        return True
+
+
 def build_drpp_base_graph(
     G_drive: nx.MultiDiGraph,
     G_service_directed: nx.MultiDiGraph,
     R: nx.DiGraph,
     *,
     diagnostics_path: str = None,
+    scc: tuple = None,
+    workers: int = 1,
 ) -> nx.MultiDiGraph:
     """
     Solve a directed RPP-like problem where:
@@ -176,6 +459,10 @@ def build_drpp_base_graph(
             weight: float
             geometry: shapely LineString or None (should be mostly present)
             kind: "required" | "connector" | "duplicate"
+
+    scc: compute_scc_index(G_drive) to reuse, e.g. the index returned by
+    find_drpp_blocking_edges for the same G_drive; computed here if None.
+    workers > 1 runs the connector Dijkstra sweeps in a process pool.
     """
 
     required_nodes = set()
@@ -189,7 +476,7 @@ def build_drpp_base_graph(
 
     if required_nodes:
         required_sccs = []
-        scc_index, scc_sizes, largest_scc_id = compute_scc_index(G_drive)
+        scc_index, scc_sizes, largest_scc_id = scc if scc is not None else compute_scc_index(G_drive)
 
         if diagnostics_path:
             try:
@@ -204,10 +491,12 @@ def build_drpp_base_graph(
             except OSError as e:
                 raise RuntimeError(f"Failed to write diagnostics to {diagnostics_path}") from e
 
-        for comp in nx.strongly_connected_components(G_drive):
-            req_in_comp = required_nodes.intersection(comp)
-            if req_in_comp:
-                required_sccs.append((len(comp), sorted(req_in_comp)[:3]))
+        # Group required nodes by SCC from the index instead of a second SCC pass.
+        req_by_scc = {}
+        for n in required_nodes:
+            req_by_scc.setdefault(scc_index[n], []).append(n)
+        for idx in sorted(req_by_scc):
+            required_sccs.append((scc_sizes[idx], sorted(req_by_scc[idx])[:3]))
 
         if len(required_sccs) > 1:
             parts = [
@@ -223,34 +512,34 @@ def build_drpp_base_graph(
     components = list(nx.strongly_connected_components(R))
     reps = [next(iter(c)) for c in components]
 
-    connector_paths = []
-    for a, b in zip(reps[:-1], reps[1:]):
-        try:
-            _, path = nx.single_source_dijkstra(G_drive, a, b, weight="weight")
-        except nx.NetworkXNoPath:
-            try:
-                _, path = nx.single_source_dijkstra(G_drive, b, a, weight="weight")
-                path = list(reversed(path))
-            except nx.NetworkXNoPath as e:
-                raise RuntimeError(
-                    f"No directed path between required components: {a} <-> {b}. "
-                    "Required nodes may not be in the same strongly connected component "
-                    "of G_drive."
-                ) from e
-
-        connector_paths.append(path)
+    connector_paths = _connector_paths(drive_csr(G_drive), reps, workers)
+    for a, b, path in connector_paths:
+        if path is None:
+            raise RuntimeError(
+                f"No directed path between required components: {a} <-> {b}. "
+                "Required nodes may not be in the same strongly connected component "
+                "of G_drive."
+            )
 
     # ---- Step 1: Build multigraph E with geometry (from service graph) ----
     E = nx.MultiDiGraph()
+    # (u, v) -> (weight, geometry) picks, local to this build.
+    best_edges = {}
 
     # Required arcs
-    for u, v in R.edges():
-        add_arc_with_geometry(E, G_service_directed, u, v, kind="required")
+    E.add_edges_from(
+        _edges_with_geometry(
+            G_service_directed, R.edges(), "required", best_edges, "G_service_directed"
+        )
+    )
 
     # Connector arcs to join components
-    for path in connector_paths:
-        for u, v in zip(path[:-1], path[1:]):
-            add_arc_with_geometry(E, G_service_directed, u, v, kind="connector")
+    connector_steps = (step for _a, _b, path in connector_paths for step in zip(path, path[1:]))
+    E.add_edges_from(
+        _edges_with_geometry(
+            G_service_directed, connector_steps, "connector", best_edges, "G_service_directed"
+        )
+    )
 
     return E
 
@@ -264,6 +553,7 @@ def solve_drpp(
     start_node=None,
     end_node=None,
     base_graph: nx.MultiDiGraph | None = None,
+    workers: int = 1,
 ) -> nx.MultiDiGraph:
     """
     Solve a directed RPP-like problem where:
@@ -287,6 +577,7 @@ def solve_drpp(
             G_service_directed,
             R,
             diagnostics_path=diagnostics_path,
+            workers=workers,
         )
     else:
         E = base_graph.copy()
@@ -299,7 +590,9 @@ def solve_drpp(
     open_route = end_node is not None and start_node is not None and end_node != start_node
 
     # ---- Step 2: Balance in/out degrees via min-cost flow ----
-    delta = {n: E.out_degree(n) - E.in_degree(n) for n in E.nodes}
+    in_degree = dict(E.in_degree())
+    balance = {n: d - in_degree[n] for n, d in E.out_degree()}
+    delta = dict(balance)
     if open_route:
         delta[start_node] -= 1
         delta[end_node] += 1
@@ -308,37 +601,49 @@ def solve_drpp(
     d_plus = [n for n, d in delta.items() if d > 0]
 
     if d_minus or d_plus:
-        sp_cache = {}
-        flow_graph = nx.DiGraph()
-
-        for n in d_minus:
-            flow_graph.add_node(n, demand=delta[n])
-        for n in d_plus:
-            flow_graph.add_node(n, demand=delta[n])
-
-        for i in d_minus:
-            for j in d_plus:
-                try:
-                    dist, path = nx.single_source_dijkstra(G_drive, i, j, weight="weight")
-                except nx.NetworkXNoPath as e:
-                    raise RuntimeError(f"No directed path for imbalance repair: {i} -> {j}") from e
+        # One Dijkstra sweep per deficit node covers all surplus targets.
+        drive = drive_csr(G_drive)
+        cost = distance_matrix(drive, d_minus, d_plus, workers)
+        unreachable = np.argwhere(np.isinf(cost))
+        if len(unreachable):
+            row, col = unreachable[0]
+            raise RuntimeError(f"No directed path for imbalance repair: {d_minus[row]} -> {d_plus[col]}")
 
-                sp_cache[(i, j)] = path
-                flow_graph.add_edge(i, j, weight=dist, capacity=float("inf"))
+        flow_units = _transport_units(d_minus, d_plus, delta, cost)
+        # Paths only for the pairs that carry flow.
+        sp_cache = shortest_paths(drive, flow_units, workers)
 
-        flow_result = nx.algorithms.flow.min_cost_flow(flow_graph)
+        best_edges = {}
 
+        duplicate_arcs = []
         for i in d_minus:
             for j in d_plus:
-                if flow_result[i].get(j, 0) > 0:
-                    path = sp_cache[(i, j)]
-                    for a, b in zip(path[:-1], path[1:]):
-                        add_arc_with_geometry(E, G_service_directed, a, b, kind="duplicate")
+                # Each unit of flow is one extra traversal of the i -> j path.
+                units = flow_units.get((i, j), 0)
+                if not units:
+                    continue
+                path = sp_cache[(i, j)]
+                path_arcs = list(
+                    _edges_with_geometry(
+                        G_service_directed,
+                        zip(path, path[1:]),
+                        "duplicate",
+                        best_edges,
+                        "G_service_directed",
+                    )
+                )
+                duplicate_arcs.extend(path_arcs * units)
+                # Interior path nodes gain one in and one out arc; only the
+                # ends change balance.
+                balance[i] += units
+                balance[j] -= units
+        # add_edges_from copies each attribute dict, so repeated units
+        # still get separate edge data.
+        E.add_edges_from(duplicate_arcs)
 
     # ---- Step 3: final invariants ----
     if open_route:
-        delta_after = {n: E.out_degree(n) - E.in_degree(n) for n in E.nodes}
-        for n, d in delta_after.items():
+        for n, d in balance.items():
             if n == start_node:
                 if d != 1:
                     raise RuntimeError(
@@ -353,21 +658,38 @@ def solve_drpp(
                 raise RuntimeError(
                     f"Directed open route imbalance remains at {n}: out-in={d} (expected 0)."
                 )
-        if not nx.has_eulerian_path(E):
+        # Balance is verified above; only connectivity is left to check.
+        if not nx.is_weakly_connected(E):
             raise RuntimeError("Directed RPP open route has no Eulerian path.")
     else:
-        for n in E.nodes:
-            if E.out_degree(n) != E.in_degree(n):
+        for n, d in balance.items():
+            if d != 0:
                 raise RuntimeError(
                     f"Directed imbalance remains at {n}: out={E.out_degree(n)}, in={E.in_degree(n)}"
                 )
 
-        if not nx.is_eulerian(E):
+        if not nx.is_strongly_connected(E):
             raise RuntimeError("Directed RPP result is not Eulerian.")
 
     return E
 
 
+def _transport_units(d_minus: list, d_plus: list, delta: dict, cost: np.ndarray) -> dict:
+    """
+    Min-cost routing of the imbalance as (i, j) -> units, for deficit nodes
+    i in d_minus and surplus nodes j in d_plus with path costs cost[i, j].
+
+    The repair arcs are uncapacitated, so this is a transportation problem.
+    Expanding every node into one slot per unit of imbalance turns it into
+    a square assignment problem, which linear_sum_assignment solves exactly.
+    """
+    rows = np.repeat(np.arange(len(d_minus)), [-delta[n] for n in d_minus])
+    cols = np.repeat(np.arange(len(d_plus)), [delta[n] for n in d_plus])
+    row_ind, col_ind = linear_sum_assignment(cost[np.ix_(rows, cols)])
+    units = Counter(zip(rows[row_ind].tolist(), cols[col_ind].tolist()))
+    return {(d_minus[a], d_plus[b]): n for (a, b), n in units.items()}
+
+
 def compute_scc_index(G_drive: nx.MultiDiGraph):
     scc_index = {}
     scc_sizes = {}
@@ -422,38 +744,46 @@ def write_drpp_diagnostics(
         if scc_index.get(u, None) != scc_index.get(v, None)
     ]
 
+    required_outside.sort()
+    # Each section goes to the file as it is generated, so the report is
+    # never held in memory as one string.
     with open(path, "w", encoding="utf-8") as f:
-        f.write("# DRPP diagnostics\n")
-        f.write(f"drive_nodes={G_drive.number_of_nodes()}\n")
-        f.write(f"drive_edges={G_drive.number_of_edges()}\n")
-        f.write(f"required_nodes={len(required_nodes)}\n")
-        f.write(f"required_edges={len(required_edges)}\n")
-        f.write(f"scc_count={len(scc_sizes)}\n")
+        f.write(
+            "# DRPP diagnostics\n"
+            f"drive_nodes={G_drive.number_of_nodes()}\n"
+            f"drive_edges={G_drive.number_of_edges()}\n"
+            f"required_nodes={len(required_nodes)}\n"
+            f"required_edges={len(required_edges)}\n"
+            f"scc_count={len(scc_sizes)}\n"
+        )
         if largest_scc_id is not None:
-            f.write(f"largest_scc_id={largest_scc_id}\n")
-            f.write(f"largest_scc_size={scc_sizes[largest_scc_id]}\n")
-        f.write(f"required_nodes_outside_largest_scc={len(required_outside)}\n")
-        f.write(f"required_edges_outside_largest_scc={len(required_edges_outside)}\n")
-        f.write(f"required_edges_crossing_sccs={len(cross_scc_edges)}\n")
-        f.write("\n")
+            f.write(
+                f"largest_scc_id={largest_scc_id}\n"
+                f"largest_scc_size={scc_sizes[largest_scc_id]}\n"
+            )
+        f.write(
+            f"required_nodes_outside_largest_scc={len(required_outside)}\n"
+            f"required_edges_outside_largest_scc={len(required_edges_outside)}\n"
+            f"required_edges_crossing_sccs={len(cross_scc_edges)}\n"
+            "\n"
+        )
 
         f.write("[required_nodes_outside_largest_scc]\n")
-        for n in sorted(required_outside):
-            f.write(f"{n},scc={scc_index.get(n, None)}\n")
+        f.writelines(f"{n},scc={scc_index.get(n, None)}\n" for n in required_outside)
         f.write("\n")
 
         f.write("[required_edges_outside_largest_scc]\n")
-        for u, v in required_edges_outside:
-            f.write(
-                f"{u},{v},scc_u={scc_index.get(u, None)},scc_v={scc_index.get(v, None)}\n"
-            )
+        f.writelines(
+            f"{u},{v},scc_u={scc_index.get(u, None)},scc_v={scc_index.get(v, None)}\n"
+            for u, v in required_edges_outside
+        )
         f.write("\n")
 
         f.write("[required_edges_crossing_sccs]\n")
-        for u, v in cross_scc_edges:
-            f.write(
-                f"{u},{v},scc_u={scc_index.get(u, None)},scc_v={scc_index.get(v, None)}\n"
-            )
+        f.writelines(
+            f"{u},{v},scc_u={scc_index.get(u, None)},scc_v={scc_index.get(v, None)}\n"
+            for u, v in cross_scc_edges
+        )
 
 
 def add_edge_with_geometry(
@@ -468,20 +798,7 @@ def add_edge_with_geometry(
     Prefer candidates with geometry to avoid straight-line fallbacks.
     Do NOT pass a key so MultiGraph can represent duplicates.
     """
-    edge_candidates = G_service.get_edge_data(u, v)
-    if not edge_candidates:
-        raise RuntimeError(f"No edge data in G_service for ({u}, {v})")
-
-    # Prefer candidates with geometry
-    with_geom = [d for d in edge_candidates.values() if d.get("geometry") is not None]
-
-    if with_geom:
-        data = min(with_geom, key=lambda d: d.get("weight", d.get("length", 1.0)))
-    else:
-        data = min(edge_candidates.values(), key=lambda d: d.get("weight", d.get("length", 1.0)))
-
-    weight = data.get("weight", data.get("length", 1.0))
-    geom = data.get("geometry")
+    weight, geom = _best_edge(G_service, u, v, None, "G_service")
 
     E.add_edge(
         u,
@@ -504,19 +821,7 @@ def add_arc_with_geometry(
     Prefer candidates with geometry to avoid straight-line fallbacks.
     Do NOT pass a key so MultiDiGraph can represent duplicates.
     """
-    edge_candidates = G_service_directed.get_edge_data(u, v)
-    if not edge_candidates:
-        raise RuntimeError(f"No edge data in G_service_directed for ({u}, {v})")
-
-    with_geom = [d for d in edge_candidates.values() if d.get("geometry") is not None]
-
-    if with_geom:
-        data = min(with_geom, key=lambda d: d.get("weight", d.get("length", 1.0)))
-    else:
-        data = min(edge_candidates.values(), key=lambda d: d.get("weight", d.get("length", 1.0)))
-
-    weight = data.get("weight", data.get("length", 1.0))
-    geom = data.get("geometry")
+    weight, geom = _best_edge(G_service_directed, u, v, None, "G_service_directed")
 
     E.add_edge(
         u,
@@ -525,3 +830,40 @@ def add_arc_with_geometry(
         geometry=geom,
         kind=kind,
     )
+
+
+def _edges_with_geometry(
+    G_service: nx.MultiGraph,
+    pairs,
+    kind: str,
+    best_edges: dict,
+    graph_name: str,
+):
+    """
+    Yield (u, v, attrs) for E.add_edges_from, one per (u, v) in pairs, with
+    the same weight/geometry pick as add_edge_with_geometry.
+    """
+    for u, v in pairs:
+        weight, geom = _best_edge(G_service, u, v, best_edges, graph_name)
+        yield u, v, {"weight": weight, "geometry": geom, "kind": kind}
+
+
+def _best_edge(G_service: nx.MultiGraph, u, v, best_edges: dict | None, graph_name: str):
+    if best_edges is not None:
+        entry = best_edges.get((u, v))
+        if entry is not None:
+            return entry
+
+    edge_candidates = G_service.get_edge_data(u, v)
+    if not edge_candidates:
+        raise RuntimeError(f"No edge data in {graph_name} for ({u}, {v})")
+
+    # Prefer candidates with geometry to avoid straight-line fallbacks.
+    best, weight = best_parallel_edge(edge_candidates)
+    entry = (weight, best.get("geometry"))
+
+    if best_edges is not None:
+        best_edges[(u, v)] = entry
+        if not G_service.is_directed():
+            best_edges[(v, u)] = entry
+    return entry
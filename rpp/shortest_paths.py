@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+# Sources per csgraph call; bounds the (sources x nodes) distance and
+# predecessor matrices on large networks.
+_SOURCE_BATCH = 64
+# Source count from which distance_matrix sweeps a chain-contracted copy of
+# the graph; below it the contraction pass costs more than it saves.
+_CONTRACT_MIN_SOURCES = 64
+
+
+def drive_csr(G_drive: nx.Graph):
+    """
+    Return the drive tuple (nodes, index, csr) for G_drive: node list,
+    node -> row index, and a CSR weight matrix with parallel edges
+    collapsed to their minimum. Undirected graphs are stored symmetrically.
+
+    The sweeps below take this tuple rather than the graph, so a caller
+    builds it once per solve and passes it down; rebuild it after changing
+    G_drive.
+    """
+    nodes = list(G_drive)
+    index = {n: i for i, n in enumerate(nodes)}
+    rows = []
+    cols = []
+    weights = []
+    for u, v, w in G_drive.edges(data="weight", default=1):
+        rows.append(index[u])
+        cols.append(index[v])
+        weights.append(w)
+    rows = np.array(rows, dtype=np.int64)
+    cols = np.array(cols, dtype=np.int64)
+    weights = np.array(weights, dtype=np.float64)
+    if not G_drive.is_directed():
+        rows, cols = np.concatenate([rows, cols]), np.concatenate([cols, rows])
+        weights = np.concatenate([weights, weights])
+    csr = _min_csr(rows, cols, weights, len(nodes))
+
+    return nodes, index, csr
+
+
+def distance_matrix(
+    drive: tuple,
+    sources,
+    targets,
+    workers: int = 1,
+    limit: float | None = None,
+) -> np.ndarray:
+    """
+    Dense (sources x targets) shortest-path distance matrix over drive (see
+    drive_csr), with inf where a target is unreachable or beyond limit,
+    using scipy's compiled Dijkstra.
+
+    Only distances are returned; fetch the few paths that end up being used
+    with shortest_paths. With workers > 1 the source batches run in a
+    process pool that receives the CSR matrix once, through the pool
+    initializer.
+
+    From _CONTRACT_MIN_SOURCES sources on, the sweeps run on
+    contract_chains of the CSR matrix, keeping the sources and targets.
+    """
+    sources = list(sources)
+    nodes, index, csr = drive
+    target_idx = np.array([index[t] for t in targets], dtype=np.int64)
+    if not sources:
+        return np.empty((0, len(target_idx)))
+    source_idx = [index[s] for s in sources]
+    if len(source_idx) >= _CONTRACT_MIN_SOURCES:
+        csr = contract_chains(csr, np.union1d(source_idx, target_idx))
+    limit = np.inf if limit is None else limit
+    tasks = [(batch, target_idx, limit) for batch in _batches(source_idx)]
+    return np.vstack(_run_batches(csr, _distance_batch, tasks, workers))
+
+
+def nearest_targets(
+    drive: tuple,
+    sources,
+    targets,
+    k: int,
+    workers: int = 1,
+    groups=None,
+):
+    """
+    Positions in targets of the k nearest targets reachable from each
+    source, and their distances, as two (sources x k) arrays ordered by
+    distance. Rows with fewer reachable targets are padded with -1 / inf.
+
+    groups is an optional (source_labels, target_labels) pair; targets
+    sharing the source's label are skipped. Rows are cut down to k inside
+    each batch, so only O(sources * k) results are ever held.
+    """
+    sources = list(sources)
+    nodes, index, csr = drive
+    target_idx = np.array([index[t] for t in targets], dtype=np.int64)
+    k = min(k, len(target_idx))
+    if not sources:
+        return np.empty((0, k), dtype=np.int64), np.empty((0, k))
+    if groups is None:
+        source_groups = np.zeros(len(sources), dtype=np.int64)
+        target_groups = np.ones(len(target_idx), dtype=np.int64)
+    else:
+        source_groups, target_groups = (np.asarray(g) for g in groups)
+    source_idx = [index[s] for s in sources]
+    if len(source_idx) >= _CONTRACT_MIN_SOURCES:
+        csr = contract_chains(csr, np.union1d(source_idx, target_idx))
+    tasks = [
+        ([source_idx[p] for p in batch], target_idx, k, source_groups[batch], target_groups)
+        for batch in _batches(list(range(len(source_idx))))
+    ]
+    results = _run_batches(csr, _nearest_batch, tasks, workers)
+    return np.vstack([r[0] for r in results]), np.vstack([r[1] for r in results])
+
+
+def shortest_paths(
+    drive: tuple,
+    pairs,
+    workers: int = 1,
+    skip_unreachable: bool = False,
+) -> dict:
+    """
+    Map each (source, target) pair to its shortest node path over drive.
+    Pairs are grouped by source so each source is swept once. Unreachable
+    pairs raise nx.NetworkXNoPath, or are left out with skip_unreachable.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return {}
+    nodes, index, csr = drive
+    by_source = {}
+    for s, t in pairs:
+        by_source.setdefault(index[s], []).append(index[t])
+    tasks = [(batch, [by_source[s] for s in batch]) for batch in _batches(list(by_source))]
+
+    paths = {}
+    for (batch, targets), batch_paths in zip(tasks, _run_batches(csr, _path_batch, tasks, workers)):
+        for s, source_targets, source_paths in zip(batch, targets, batch_paths):
+            for t, path in zip(source_targets, source_paths):
+                if path is None:
+                    if skip_unreachable:
+                        continue
+                    raise nx.NetworkXNoPath(f"No path from {nodes[s]} to {nodes[t]}.")
+                paths[nodes[s], nodes[t]] = [nodes[i] for i in path]
+    return paths
+
+
+def contract_chains(csr: csr_matrix, keep) -> csr_matrix:
+    """
+    Copy of csr with every maximal chain of pass-through nodes replaced by
+    one shortcut edge weighing the chain's total.
+
+    A pass-through node is not in keep and either has one predecessor and
+    a different single successor (one-way street) or the same two
+    neighbours in both directions (two-way street). Shortcuts keep the node
+    indexing; contracted nodes are left without edges, so distances
+    between the remaining nodes are unchanged. Paths are not recoverable
+    from the result.
+    """
+    n = csr.shape[0]
+    csc = csr.tocsc()
+    out_deg = np.diff(csr.indptr)
+    in_deg = np.diff(csc.indptr)
+
+    through = np.zeros(n, dtype=bool)
+    for i in np.flatnonzero(((out_deg == 1) & (in_deg == 1)) | ((out_deg == 2) & (in_deg == 2))).tolist():
+        succ = csr.indices[csr.indptr[i]:csr.indptr[i + 1]]
+        pred = csc.indices[csc.indptr[i]:csc.indptr[i + 1]]
+        if i in succ or i in pred:
+            continue
+        if len(succ) == 1:
+            through[i] = succ[0] != pred[0]
+        else:
+            through[i] = set(succ.tolist()) == set(pred.tolist())
+    through[np.asarray(keep, dtype=np.int64)] = False
+
+    rows = []
+    cols = []
+    weights = []
+    for u in np.flatnonzero(~through).tolist():
+        for k in range(csr.indptr[u], csr.indptr[u + 1]):
+            prev, cur, total = u, int(csr.indices[k]), float(csr.data[k])
+            while through[cur]:
+                start, end = csr.indptr[cur], csr.indptr[cur + 1]
+                # One-way nodes have a single successor; two-way nodes go on
+                # to the neighbour they were not entered from.
+                step = start if end - start == 1 or csr.indices[start] != prev else start + 1
+                prev, cur = cur, int(csr.indices[step])
+                total += csr.data[step]
+            rows.append(u)
+            cols.append(cur)
+            weights.append(total)
+    return _min_csr(
+        np.array(rows, dtype=np.int64),
+        np.array(cols, dtype=np.int64),
+        np.array(weights, dtype=np.float64),
+        n,
+    )
+
+
+def _min_csr(rows: np.ndarray, cols: np.ndarray, weights: np.ndarray, n: int) -> csr_matrix:
+    # csr_matrix sums duplicate entries; keep the lightest parallel edge instead.
+    order = np.lexsort((weights, cols, rows))
+    rows, cols, weights = rows[order], cols[order], weights[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+    return csr_matrix((weights[first], (rows[first], cols[first])), shape=(n, n))
+
+
+def _batches(source_idx: list) -> list:
+    return [source_idx[i:i + _SOURCE_BATCH] for i in range(0, len(source_idx), _SOURCE_BATCH)]
+
+
+def _run_batches(csr: csr_matrix, fn, tasks: list, workers: int) -> list:
+    if workers <= 1 or len(tasks) < 2:
+        return [fn(csr, *task) for task in tasks]
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(tasks)),
+        initializer=_init_sweep_worker,
+        initargs=(csr,),
+    ) as pool:
+        return list(pool.map(_sweep_worker, [fn] * len(tasks), tasks))
+
+
+def _distance_batch(
+    csr: csr_matrix, batch: list, target_idx: np.ndarray, limit: float
+) -> np.ndarray:
+    dist = dijkstra(csr, directed=True, indices=batch, limit=limit)
+    return dist[:, target_idx]
+
+
+def _nearest_batch(
+    csr: csr_matrix,
+    batch: list,
+    target_idx: np.ndarray,
+    k: int,
+    batch_groups: np.ndarray,
+    target_groups: np.ndarray,
+) -> tuple:
+    dist = dijkstra(csr, directed=True, indices=batch)[:, target_idx]
+    dist[batch_groups[:, None] == target_groups[None, :]] = np.inf
+    nearest = np.argsort(dist, axis=1, kind="stable")[:, :k]
+    nearest_dist = np.take_along_axis(dist, nearest, axis=1)
+    nearest[~np.isfinite(nearest_dist)] = -1
+    return nearest, nearest_dist
+
+
+def _path_batch(csr: csr_matrix, batch: list, targets: list) -> list:
+    """
+    Index paths from each source in batch to its own target list (None
+    when unreachable).
+    """
+    dist, pred = dijkstra(csr, directed=True, indices=batch, return_predecessors=True)
+    return [
+        [
+            _walk_back(pred[row], source, t) if dist[row, t] != np.inf else None
+            for t in source_targets
+        ]
+        for row, (source, source_targets) in enumerate(zip(batch, targets))
+    ]
+
+
+def _walk_back(pred_row: np.ndarray, source: int, target: int) -> list:
+    path = [target]
+    while target != source:
+        target = int(pred_row[target])
+        path.append(target)
+    path.reverse()
+    return path
+
+
+_sweep_csr = None
+
+
+def _init_sweep_worker(csr: csr_matrix):
+    global _sweep_csr
+    _sweep_csr = csr
+
+
+def _sweep_worker(fn, task: tuple):
+    return fn(_sweep_csr, *task)
@@ -0,0 +1,52 @@
+import networkx as nx
+import pytest
+
+from rpp.eulerian import eulerian_tour
+
+
+def _assert_valid_tour(E, tour, source):
+    assert tour[0][0] == source
+    for (_, v, _), (u, _, _) in zip(tour[:-1], tour[1:]):
+        assert v == u
+    if E.is_directed():
+        used = sorted((u, v, k) for u, v, k in tour)
+        expected = sorted(E.edges(keys=True))
+    else:
+        used = sorted((min(u, v), max(u, v), k) for u, v, k in tour)
+        expected = sorted((min(u, v), max(u, v), k) for u, v, k in E.edges(keys=True))
+    assert used == expected
+
+
+def test_eulerian_tour_undirected_circuit_with_parallel_edges():
+    E = nx.MultiGraph()
+    E.add_edge("A", "B")
+    E.add_edge("A", "B")
+    E.add_edge("B", "C")
+    E.add_edge("C", "D")
+    E.add_edge("D", "B")
+
+    tour = eulerian_tour(E, source="A")
+
+    _assert_valid_tour(E, tour, "A")
+    assert tour[-1][1] == "A"
+
+
+def test_eulerian_tour_directed_open_path():
+    E = nx.MultiDiGraph()
+    E.add_edge("A", "B")
+    E.add_edge("B", "C")
+    E.add_edge("C", "A")
+    E.add_edge("A", "C")
+
+    tour = eulerian_tour(E, source="A", open_path=True)
+
+    _assert_valid_tour(E, tour, "A")
+    assert tour[-1][1] == "C"
+
+
+def test_eulerian_tour_rejects_unbalanced_circuit():
+    E = nx.MultiDiGraph()
+    E.add_edge("A", "B")
+
+    with pytest.raises(nx.NetworkXError):
+        eulerian_tour(E, source="A")
@@ -0,0 +1,59 @@
+import networkx as nx
+
+from rpp.filters import filter_graph_edges, is_driveable_edge
+
+
+def test_is_driveable_edge_rejects_excluded_highway_tokens():
+    assert not is_driveable_edge({"highway": "footway"})
+    assert not is_driveable_edge({"highway": "cycleway;footway"})
+    assert not is_driveable_edge({"highway": "residential; steps"})
+    assert not is_driveable_edge({"highway": ["residential", "path"]})
+
+
+def test_is_driveable_edge_accepts_regular_streets():
+    assert is_driveable_edge({"highway": "residential"})
+    assert is_driveable_edge({"highway": ["residential", "tertiary"]})
+    assert is_driveable_edge({})
+
+
+def test_is_driveable_edge_rejects_restricted_access():
+    assert not is_driveable_edge({"highway": "service", "service": "parking_aisle"})
+    assert not is_driveable_edge({"highway": "residential", "motor_vehicle": "no"})
+    assert not is_driveable_edge({"highway": "residential", "access": "Private"})
+
+
+def test_filter_graph_edges_keeps_graph_class_and_metadata():
+    G = nx.MultiDiGraph(crs="EPSG:4326")
+    G.add_node(1, x=0.0, y=0.0)
+    G.add_node(2, x=1.0, y=0.0)
+    G.add_node(3, x=2.0, y=0.0)
+    G.add_edge(1, 2, key=0, highway="residential", length=5.0)
+    G.add_edge(2, 1, key=0, highway="residential", length=5.0)
+    G.add_edge(2, 3, key=0, highway="footway", length=3.0)
+
+    H = filter_graph_edges(G)
+
+    assert isinstance(H, nx.MultiDiGraph)
+    assert H.graph["crs"] == "EPSG:4326"
+    assert set(H.edges(keys=True)) == {(1, 2, 0), (2, 1, 0)}
+    assert H.nodes[1]["x"] == 0.0
+
+    H.edges[1, 2, 0]["weight"] = 5.0
+    assert "weight" not in G.edges[1, 2, 0]
+
+
+def test_filter_graph_edges_undirected_keeps_each_edge_once():
+    G = nx.MultiGraph()
+    G.add_edge(1, 2, key=0, highway="residential")
+    G.add_edge(1, 2, key=1, highway="footway")
+    G.add_edge(2, 3, key=0, highway="tertiary")
+    G.add_edge(3, 3, key=0, highway="residential")
+
+    H = filter_graph_edges(G)
+
+    assert isinstance(H, nx.MultiGraph)
+    assert sorted((min(u, v), max(u, v), k) for u, v, k in H.edges(keys=True)) == [
+        (1, 2, 0),
+        (2, 3, 0),
+        (3, 3, 0),
+    ]
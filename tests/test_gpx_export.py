@@ -1,6 +1,14 @@
+import xml.etree.ElementTree as ET
+
 import networkx as nx
+from shapely.geometry import LineString
 
-from rpp.gpx_export import select_start_node
+from rpp.gpx_export import (
+    export_edge_list_gpx,
+    export_gpx,
+    select_endpoint_nodes,
+    select_start_node,
+)
 
 
 def test_select_start_node_snaps_to_largest_component():
@@ -19,3 +27,114 @@ def test_select_start_node_snaps_to_largest_component():
     assert strategy == "largest_component"
     assert coords in {(0.0, 0.0), (0.1, 0.0)}
     assert distance > 0
+
+
+def test_select_endpoint_nodes_snaps_start_and_end():
+    G = nx.MultiGraph()
+    G.add_node(1, x=6.10, y=51.00)
+    G.add_node(2, x=6.11, y=51.00)
+    G.add_node(3, x=6.12, y=51.00)
+    G.add_edge(1, 2, key=0, weight=1)
+    G.add_edge(2, 3, key=0, weight=1)
+
+    start_node, start_coords, _, end_node, end_coords, _, strategy = select_endpoint_nodes(
+        G, G, (51.0001, 6.1001), (51.0001, 6.1199)
+    )
+
+    assert start_node == 1
+    assert start_coords == (51.00, 6.10)
+    assert end_node == 3
+    assert end_coords == (51.00, 6.12)
+    assert strategy == "largest_component"
+
+
+GPX_NS = {"gpx": "http://www.topografix.com/GPX/1/1"}
+
+
+def _read_track_segments(path):
+    root = ET.parse(path).getroot()
+    return [
+        [
+            (float(pt.get("lat")), float(pt.get("lon")))
+            for pt in seg.findall("gpx:trkpt", GPX_NS)
+        ]
+        for seg in root.findall("gpx:trk/gpx:trkseg", GPX_NS)
+    ]
+
+
+def _triangle_graph():
+    G = nx.MultiGraph()
+    G.add_node(1, x=6.10, y=51.00)
+    G.add_node(2, x=6.11, y=51.00)
+    G.add_node(3, x=6.11, y=51.01)
+    for u, v in ((1, 2), (2, 3), (3, 1)):
+        G.add_edge(u, v, weight=1.0, geometry=None)
+    return G
+
+
+def test_export_gpx_writes_closed_tour_from_start(tmp_path):
+    G = _triangle_graph()
+    path = tmp_path / "route.gpx"
+
+    export_gpx(G, G, str(path), start_node=1)
+
+    segments = _read_track_segments(path)
+    assert len(segments) == 1
+    points = segments[0]
+    assert points[0] == (51.00, 6.10)
+    assert points[-1] == (51.00, 6.10)
+    assert len(points) == 4
+    assert set(points) == {(51.00, 6.10), (51.00, 6.11), (51.01, 6.11)}
+
+
+def test_snapping_and_export_see_moved_nodes_and_leave_graph_untouched(tmp_path):
+    G = _triangle_graph()
+    path = tmp_path / "route.gpx"
+    select_endpoint_nodes(G, G, (51.0, 6.10), None)
+    export_gpx(G, G, str(path), start_node=1)
+
+    G.nodes[1]["x"], G.nodes[1]["y"] = 6.12, 51.02
+    start_node = select_endpoint_nodes(G, G, (51.02, 6.12), None)[0]
+    export_gpx(G, G, str(path), start_node=1)
+
+    assert start_node == 1
+    assert _read_track_segments(path)[0][0] == (51.02, 6.12)
+    assert G.graph == {}
+
+
+def test_export_edge_list_gpx_writes_each_edge(tmp_path):
+    G = _triangle_graph()
+    path = tmp_path / "edges.gpx"
+
+    export_edge_list_gpx(G, [(1, 2), (3, 1)], str(path))
+
+    points = [pt for seg in _read_track_segments(path) for pt in seg]
+    assert points == [(51.00, 6.10), (51.00, 6.11), (51.01, 6.11), (51.00, 6.10)]
+
+
+def test_export_gpx_orients_geometry_along_travel_direction(tmp_path):
+    E = nx.MultiDiGraph()
+    E.add_node(1, x=6.10, y=51.00)
+    E.add_node(2, x=6.12, y=51.00)
+    # Stored from v to u; must be reversed when travelling 1 -> 2.
+    E.add_edge(1, 2, weight=1.0, geometry=LineString([(6.12, 51.00), (6.11, 51.005), (6.10, 51.00)]))
+    E.add_edge(2, 1, weight=1.0, geometry=None)
+    path = tmp_path / "route.gpx"
+
+    export_gpx(E, E, str(path), start_node=1)
+
+    points = _read_track_segments(path)[0]
+    assert points == [(51.00, 6.10), (51.005, 6.11), (51.00, 6.12), (51.00, 6.10)]
+
+
+def test_export_edge_list_gpx_merges_contiguous_edges_into_one_segment(tmp_path):
+    G = _triangle_graph()
+    path = tmp_path / "edges.gpx"
+
+    export_edge_list_gpx(G, [(1, 2), (2, 3), (1, 2)], str(path))
+
+    segments = _read_track_segments(path)
+    assert segments == [
+        [(51.00, 6.10), (51.00, 6.11), (51.01, 6.11)],
+        [(51.00, 6.10), (51.00, 6.11)],
+    ]
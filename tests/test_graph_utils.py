@@ -0,0 +1,14 @@
+from rpp.graph_utils import best_parallel_edge
+
+
+def test_best_parallel_edge_prefers_geometry_then_weight():
+    line = object()
+    candidates = {
+        0: {"weight": 1.0},
+        1: {"weight": 4.0, "geometry": line},
+        2: {"length": 3.0, "geometry": line},
+        3: {"weight": 3.0, "geometry": line},
+    }
+
+    assert best_parallel_edge(candidates) == (candidates[2], 3.0)
+    assert best_parallel_edge({0: {"weight": 2.0}, 1: {}}) == ({}, 1.0)
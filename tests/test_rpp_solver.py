@@ -1,9 +1,14 @@
 import networkx as nx
+import pytest
 
-from rpp.required_edges import build_required_graph_directed
+from rpp.required_edges import (
+    build_required_graph_directed,
+    build_required_graph_undirected,
+)
 from rpp.rpp_solver import (
     build_drpp_base_graph,
     build_rpp_base_graph,
+    find_drpp_blocking_edges,
     solve_drpp,
     solve_rpp,
 )
@@ -28,6 +33,18 @@ def test_build_required_graph_directed_filters_directional_arcs():
     assert set(R.edges()) == {("A", "B")}
 
 
+def test_build_required_graph_undirected_filters_edges():
+    G = nx.MultiGraph()
+    _add_undirected_edge(G, "A", "B", highway="residential")
+    _add_undirected_edge(G, "A", "B", highway="footway")
+    _add_undirected_edge(G, "B", "C", highway=["tertiary", "residential"])
+    _add_undirected_edge(G, "C", "D", highway="secondary")
+
+    R = build_required_graph_undirected(G)
+
+    assert {frozenset(e) for e in R.edges()} == {frozenset("AB"), frozenset("BC")}
+
+
 def test_solve_drpp_respects_one_way_arcs_and_is_eulerian():
     G_drive = nx.MultiDiGraph()
     _add_directed_edge(G_drive, "A", "B")
@@ -46,6 +63,27 @@ def test_solve_drpp_respects_one_way_arcs_and_is_eulerian():
     assert set(result.edges()).issubset(allowed_arcs)
 
 
+def test_build_drpp_base_graph_reuses_blocker_scc_index():
+    G_drive = nx.MultiDiGraph()
+    for u, v in [("A", "B"), ("B", "C"), ("C", "A"), ("C", "D")]:
+        _add_directed_edge(G_drive, u, v)
+    G_service = nx.MultiDiGraph(G_drive)
+    R = nx.DiGraph()
+    R.add_edges_from([("A", "B"), ("C", "D")])
+
+    blockers, _outside, scc_index, scc_sizes, largest = find_drpp_blocking_edges(G_drive, R)
+    assert [(u, v) for u, v, _su, _sv in blockers] == [("C", "D")]
+    R.remove_edge("C", "D")
+    R.remove_node("D")
+
+    reused = build_drpp_base_graph(G_drive, G_service, R, scc=(scc_index, scc_sizes, largest))
+    fresh = build_drpp_base_graph(G_drive, G_service, R)
+
+    assert sorted(reused.edges()) == sorted(fresh.edges())
+    assert reused.has_edge("A", "B")
+    assert G_drive.graph == {}
+
+
 def test_solve_rpp_regression_undirected_eulerian():
     G_drive = nx.MultiDiGraph()
     _add_directed_edge(G_drive, "A", "B")
@@ -66,6 +104,120 @@ def test_solve_rpp_regression_undirected_eulerian():
     assert nx.is_eulerian(result)
 
 
+def test_build_rpp_base_graph_connects_components_along_spanning_tree():
+    G_drive = nx.MultiDiGraph()
+    G_service = nx.MultiGraph()
+    for u, v in [("A", "B"), ("B", "C"), ("C", "D"), ("D", "E"), ("E", "F")]:
+        _add_directed_edge(G_drive, u, v)
+        _add_directed_edge(G_drive, v, u)
+        _add_undirected_edge(G_service, u, v)
+
+    # Chaining the components in R's order would run A -> E -> C.
+    R = nx.Graph()
+    R.add_edges_from([("A", "B"), ("E", "F"), ("C", "D")])
+
+    E = build_rpp_base_graph(G_drive, G_service, R)
+
+    assert nx.is_connected(E)
+    kinds = [kind for _u, _v, kind in E.edges(data="kind")]
+    assert kinds.count("required") == 3
+    assert kinds.count("connector") == 4
+
+
+def test_build_rpp_base_graph_joins_nearest_neighbour_clusters(monkeypatch):
+    import rpp.rpp_solver as solver
+
+    # With one candidate per component, A/B and E/F only pick each other;
+    # the Boruvka round then has to add the B-E link.
+    G_drive = nx.MultiDiGraph()
+    G_service = nx.MultiGraph()
+    for u, v, w in [("A", "B", 1.0), ("B", "E", 5.0), ("E", "F", 1.0)]:
+        _add_directed_edge(G_drive, u, v, weight=w)
+        _add_directed_edge(G_drive, v, u, weight=w)
+        _add_undirected_edge(G_service, u, v, weight=w)
+    for n in "ABEF":
+        G_drive.add_edge(n, n + "'", weight=0.5)
+        G_drive.add_edge(n + "'", n, weight=0.5)
+        G_service.add_edge(n, n + "'", weight=0.5, geometry=None)
+    R = nx.Graph()
+    R.add_edges_from([(n, n + "'") for n in "ABEF"])
+
+    monkeypatch.setattr(solver, "_CONNECTOR_NEIGHBORS", 1)
+    E = build_rpp_base_graph(G_drive, G_service, R)
+
+    assert nx.is_connected(E)
+    connectors = [(u, v) for u, v, kind in E.edges(data="kind") if kind == "connector"]
+    assert sorted(map(sorted, connectors)) == [["A", "B"], ["B", "E"], ["E", "F"]]
+
+
+def test_build_rpp_base_graph_reuses_memoized_graph(monkeypatch):
+    import rpp.rpp_solver as solver
+
+    G_drive = nx.MultiDiGraph()
+    G_service = nx.MultiGraph()
+    for u, v in [("A", "B"), ("B", "C"), ("C", "D")]:
+        _add_directed_edge(G_drive, u, v)
+        _add_directed_edge(G_drive, v, u)
+        _add_undirected_edge(G_service, u, v)
+    R = nx.Graph()
+    R.add_edges_from([("A", "B"), ("C", "D")])
+    memo = {}
+
+    first = build_rpp_base_graph(G_drive, G_service, R, memo=memo, version=1)
+    first.add_edge("A", "D")
+
+    def fail(*_args):
+        raise AssertionError("base graph was rebuilt")
+
+    monkeypatch.setattr(solver, "_spanning_connector_paths", fail)
+    second = build_rpp_base_graph(G_drive, G_service, R, memo=memo, version=1)
+    assert second.number_of_edges() == first.number_of_edges() - 1
+    assert nx.is_eulerian(solve_rpp(G_drive, G_service, R, base_memo=memo, base_version=1))
+    assert "_rpp_base" not in G_service.graph
+
+    # A new version, other required edges, or no memo all rebuild.
+    for kwargs in ({"memo": memo, "version": 2}, {}):
+        with pytest.raises(AssertionError, match="rebuilt"):
+            build_rpp_base_graph(G_drive, G_service, R, **kwargs)
+    R.add_edge("B", "C")
+    with pytest.raises(AssertionError, match="rebuilt"):
+        build_rpp_base_graph(G_drive, G_service, R, memo=memo, version=1)
+
+
+def test_build_rpp_base_graph_picks_up_service_weight_changes():
+    G_drive = nx.MultiDiGraph()
+    G_service = nx.MultiGraph()
+    _add_directed_edge(G_drive, "A", "B")
+    _add_directed_edge(G_drive, "B", "A")
+    _add_undirected_edge(G_service, "A", "B", weight=2.0)
+    R = nx.Graph()
+    R.add_edge("A", "B")
+
+    first = build_rpp_base_graph(G_drive, G_service, R)
+    G_service["A"]["B"][0]["weight"] = 7.0
+    second = build_rpp_base_graph(G_drive, G_service, R)
+
+    assert [w for _u, _v, w in first.edges(data="weight")] == [2.0]
+    assert [w for _u, _v, w in second.edges(data="weight")] == [7.0]
+    assert G_service.graph == {}
+
+
+def test_solvers_leave_input_graph_attributes_untouched():
+    G_drive = nx.MultiDiGraph()
+    for u, v in [("A", "B"), ("B", "C"), ("C", "A")]:
+        _add_directed_edge(G_drive, u, v)
+    G_service = nx.MultiDiGraph(G_drive)
+    G_service_undirected = nx.MultiGraph(G_drive)
+    R_directed = nx.DiGraph([("A", "B")])
+    R = nx.Graph([("A", "B")])
+
+    find_drpp_blocking_edges(G_drive, R_directed)
+    solve_drpp(G_drive, G_service, R_directed)
+    solve_rpp(G_drive, G_service_undirected, R)
+
+    assert G_drive.graph == G_service.graph == G_service_undirected.graph == {}
+
+
 def test_solve_rpp_open_route_uses_start_end():
     G_drive = nx.MultiDiGraph()
     _add_directed_edge(G_drive, "A", "B")
@@ -121,3 +273,79 @@ def test_solve_drpp_open_route_uses_start_end():
     assert delta_after["C"] == -1
     assert all(d == 0 for n, d in delta_after.items() if n not in {"A", "C"})
     assert nx.has_eulerian_path(result)
+
+
+def test_solve_rpp_parallel_sweeps_match_serial(monkeypatch):
+    import rpp.shortest_paths
+
+    # One source per batch, so the odd-node sweeps go to the pool.
+    monkeypatch.setattr(rpp.shortest_paths, "_SOURCE_BATCH", 1)
+    G_drive = nx.MultiGraph()
+    for u, v, w in [("A", "B", 1.0), ("B", "C", 2.0), ("C", "D", 1.5), ("D", "A", 3.0), ("A", "C", 2.5)]:
+        _add_undirected_edge(G_drive, u, v, weight=w)
+    _add_undirected_edge(G_drive, "A", "B", weight=4.0)
+    G_service = nx.MultiGraph(G_drive)
+
+    R = nx.Graph()
+    R.add_edge("A", "B")
+    R.add_edge("C", "D")
+
+    serial = solve_rpp(G_drive, G_service, R)
+    parallel = solve_rpp(G_drive, G_service, R, workers=2)
+
+    assert nx.is_eulerian(parallel)
+    assert parallel.size(weight="weight") == serial.size(weight="weight")
+
+
+def test_build_drpp_base_graph_parallel_connectors_match_serial(monkeypatch):
+    import rpp.shortest_paths
+
+    G_drive = nx.MultiDiGraph()
+    for u, v in [("A", "B"), ("B", "C"), ("C", "D"), ("D", "E"), ("E", "F"), ("F", "A")]:
+        _add_directed_edge(G_drive, u, v)
+    G_service = nx.MultiDiGraph(G_drive)
+    R = nx.DiGraph()
+    R.add_edges_from([("A", "B"), ("C", "D"), ("E", "F")])
+
+    monkeypatch.setattr(rpp.shortest_paths, "_SOURCE_BATCH", 1)
+    serial = build_drpp_base_graph(G_drive, G_service, R)
+    parallel = build_drpp_base_graph(G_drive, G_service, R, workers=2)
+
+    assert sorted(parallel.edges(data="kind")) == sorted(serial.edges(data="kind"))
+    assert any(kind == "connector" for _u, _v, kind in parallel.edges(data="kind"))
+
+
+def test_solve_drpp_repeats_path_for_multi_unit_flow():
+    G_drive = nx.MultiDiGraph()
+    for u, v in [("A", "B"), ("A", "C"), ("B", "D"), ("C", "D"), ("D", "A")]:
+        _add_directed_edge(G_drive, u, v)
+
+    G_service = nx.MultiDiGraph(G_drive)
+    R = nx.DiGraph([("A", "B"), ("A", "C"), ("B", "D"), ("C", "D")])
+    # D has two surplus in-arcs and A two surplus out-arcs: two units of flow on D -> A.
+    base_graph = nx.MultiDiGraph(R)
+
+    result = solve_drpp(G_drive, G_service, R, base_graph=base_graph)
+
+    assert result.number_of_edges("D", "A") == 2
+    assert nx.is_eulerian(result)
+
+
+def test_solve_rpp_sparse_matching_matches_complete_graph(monkeypatch):
+    G_drive = nx.MultiGraph()
+    for i in range(15):
+        _add_undirected_edge(G_drive, i, i + 1, weight=1.0 + (i % 3))
+    G_service = nx.MultiGraph(G_drive)
+
+    R = nx.Graph()
+    for i in range(0, 15, 2):
+        R.add_edge(i, i + 1)
+    base_graph = build_rpp_base_graph(G_drive, G_service, R)
+
+    complete = solve_rpp(G_drive, G_service, R, base_graph=base_graph)
+    monkeypatch.setattr("rpp.rpp_solver._SPARSE_MATCHING_MIN_NODES", 0)
+    monkeypatch.setattr("rpp.rpp_solver._MATCHING_NEIGHBORS", 1)
+    sparse = solve_rpp(G_drive, G_service, R, base_graph=base_graph)
+
+    assert nx.is_eulerian(sparse)
+    assert sparse.size(weight="weight") == complete.size(weight="weight")
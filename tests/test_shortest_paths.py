@@ -0,0 +1,112 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from rpp.shortest_paths import distance_matrix, drive_csr, nearest_targets, shortest_paths
+
+
+def _directed_graph():
+    G = nx.MultiDiGraph()
+    G.add_edge("A", "B", weight=5.0)
+    G.add_edge("A", "B", weight=1.0)
+    G.add_edge("B", "C", weight=1.0)
+    G.add_edge("A", "C", weight=3.0)
+    G.add_edge("C", "D", weight=0.0)
+    G.add_node("E")
+    return G
+
+
+def test_distance_matrix_matches_networkx_on_directed_multigraph():
+    G = _directed_graph()
+
+    dist = distance_matrix(drive_csr(G), ["A", "C"], ["B", "C", "D", "E"])
+
+    np.testing.assert_array_equal(dist, [[1.0, 2.0, 2.0, np.inf], [np.inf, 0.0, 0.0, np.inf]])
+
+
+def test_distance_matrix_marks_unreachable_and_out_of_range_targets_inf():
+    G = _directed_graph()
+
+    dist = distance_matrix(drive_csr(G), ["A", "D"], ["C", "A", "E"])
+    bounded = distance_matrix(drive_csr(G), ["A"], ["B", "C"], limit=1.5)
+
+    np.testing.assert_array_equal(dist, [[2.0, 0.0, np.inf], [np.inf, np.inf, np.inf]])
+    np.testing.assert_array_equal(bounded, [[1.0, np.inf]])
+    assert distance_matrix(drive_csr(G), [], ["A"]).shape == (0, 1)
+
+
+def test_nearest_targets_skips_same_group_and_pads_unreachable():
+    G = _directed_graph()
+    targets = ["A", "B", "C", "D"]
+
+    nearest, dist = nearest_targets(drive_csr(G), ["A", "D"], targets, 2)
+    grouped, grouped_dist = nearest_targets(drive_csr(G), ["A"], targets, 2, groups=([0], [0, 0, 1, 1]))
+
+    np.testing.assert_array_equal(nearest, [[0, 1], [3, -1]])
+    np.testing.assert_array_equal(dist, [[0.0, 1.0], [0.0, np.inf]])
+    np.testing.assert_array_equal(grouped, [[2, 3]])
+    np.testing.assert_array_equal(grouped_dist, [[2.0, 2.0]])
+
+
+def test_shortest_paths_reconstructs_requested_pairs_only():
+    G = _directed_graph()
+
+    paths = shortest_paths(drive_csr(G), [("A", "D"), ("C", "C")])
+
+    assert paths == {("A", "D"): ["A", "B", "C", "D"], ("C", "C"): ["C"]}
+    with pytest.raises(nx.NetworkXNoPath):
+        shortest_paths(drive_csr(G), [("D", "A")])
+    assert shortest_paths(drive_csr(G), [("D", "A"), ("B", "D")], skip_unreachable=True) == {
+        ("B", "D"): ["B", "C", "D"]
+    }
+
+
+def test_shortest_paths_treats_undirected_edges_both_ways():
+    G = nx.MultiGraph()
+    G.add_edge("A", "B", weight=2.0)
+    G.add_edge("B", "C", weight=1.0)
+
+    np.testing.assert_array_equal(distance_matrix(drive_csr(G), ["C"], ["A"]), [[3.0]])
+    assert shortest_paths(drive_csr(G), [("C", "A")]) == {("C", "A"): ["C", "B", "A"]}
+
+
+def test_drive_csr_reflects_weight_changes_and_leaves_graph_untouched():
+    G = nx.MultiDiGraph()
+    G.add_edge("A", "B", weight=2.0)
+    G.add_edge("B", "C", weight=1.0)
+    before = distance_matrix(drive_csr(G), ["A"], ["C"])
+
+    G["A"]["B"][0]["weight"] = 5.0
+    after = distance_matrix(drive_csr(G), ["A"], ["C"])
+
+    np.testing.assert_array_equal(before, [[3.0]])
+    np.testing.assert_array_equal(after, [[6.0]])
+    assert G.graph == {}
+
+
+def test_contracted_sweeps_match_full_graph(monkeypatch):
+    import rpp.shortest_paths as sp
+
+    # Two-way chain A-x1-x2-B, a parallel shorter one-way chain A>y1>B,
+    # a one-way chain B>z1>z2>C and a two-way chain C-w1-A with w1 queried.
+    G = nx.MultiDiGraph()
+    for u, v, w in [("A", "x1", 2.0), ("x1", "x2", 1.0), ("x2", "B", 4.0)]:
+        G.add_edge(u, v, weight=w)
+        G.add_edge(v, u, weight=w)
+    for u, v, w in [("A", "y1", 3.0), ("y1", "B", 1.5), ("B", "z1", 1.0), ("z1", "z2", 2.0), ("z2", "C", 0.5)]:
+        G.add_edge(u, v, weight=w)
+    for u, v, w in [("C", "w1", 1.0), ("w1", "A", 6.0)]:
+        G.add_edge(u, v, weight=w)
+        G.add_edge(v, u, weight=w)
+    nodes = ["A", "B", "C", "w1"]
+
+    expected = distance_matrix(drive_csr(G), nodes, nodes)
+    monkeypatch.setattr(sp, "_CONTRACT_MIN_SOURCES", 1)
+    contracted = distance_matrix(drive_csr(G), nodes, nodes)
+
+    np.testing.assert_array_equal(contracted, expected)
+    _nodes, index, csr = sp.drive_csr(G)
+    short = sp.contract_chains(csr, [index[n] for n in nodes])
+    assert short[index["A"], index["B"]] == 4.5
+    assert short[index["B"], index["C"]] == 3.5
+    assert short.getrow(index["x1"]).nnz == 0